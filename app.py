@@ -1,44 +1,282 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-import json
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context
+import click
 import os
-from datetime import datetime
-from utils.card_generator import batch_generate_cards
+import secrets
+from datetime import datetime, timezone
+from utils.card_generator import MAX_BATCH_SIZE, batch_prefix
+from utils.minting import mint_cards
+from utils.claims import claim_card, claim_cards, CLAIM_MESSAGES, MAX_BATCH_CLAIMS
+from utils.quiz_bank import QuizBank
+from utils.user_cache import UserCache
+from utils.pagination import DEFAULT_PAGE_SIZE, encode_cursor, decode_cursor, parse_limit, quote_filter_value
+from utils.export import EXPORT_FORMATS, iter_rows, stream_csv, stream_ndjson
+from utils.qr_renderer import QR_FORMATS, get_qr, render_sheet_pdf
+from utils.progress import apply_event, current_streak, normalized_skill_progress
+from utils.leaderboard import Leaderboard
+from utils.memory_backend import MemoryBackend
+from utils.instrumentation import init_instrumentation, trace_backend, route_metrics, profiler
+from utils.write_behind import WriteBehindQueue, deep_merge
+from utils.page_cache import FragmentCache, fragment_response
+from utils.static_assets import init_static_assets
+from utils.concurrency import gather
+from utils.quiz_attempts import record_attempt, QUIZ_PASS_POINTS
+from utils.quiz_analytics import compute_item_stats
+from utils.auth import PasswordHasher, TokenBucket, AuthBusy, DEFAULT_HASH_METHOD, is_hashed
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 app = Flask(__name__)
 load_dotenv() # Load environment variables from .env file
-
-app.secret_key = "dev-secret-change-me"
+init_instrumentation(app) # Server-Timing, request logs and per-route metrics
+init_static_assets(app) # static_url() with content fingerprints and long-lived caching
+
+app.secret_key = os.environ.get("SECRET_KEY")
+if not app.secret_key:
+    # Sessions then only last as long as this process (and aren't shared between workers)
+    app.logger.warning("SECRET_KEY is not set; using a random per-process key")
+    app.secret_key = secrets.token_hex(32)
+
+# Behind a reverse proxy, trust its X-Forwarded-For so the login throttle sees client IPs
+if os.environ.get("TRUSTED_PROXY_COUNT"):
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=int(os.environ["TRUSTED_PROXY_COUNT"]))
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+QR_CACHE_DIR = os.environ.get("QR_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'qr_cache'))
+# Most cards one /admin/generate request mints, so it finishes well inside the worker timeout
+# (one insert per 1000 cards); `flask --app app mint-cards` mints larger batches
+MINT_MAX_CARDS = int(os.environ.get("MINT_MAX_CARDS", 5000))
+# Largest QR sheet rendered in one request (12 cards per page); bigger runs print batch by batch
+QR_SHEET_MAX_CARDS = int(os.environ.get("QR_SHEET_MAX_CARDS", 1200))
+quiz_bank = QuizBank(os.path.join(DATA_DIR, 'questions.json'))
+# Skill and quiz content is the same for everyone, so it is rendered once per template version
+page_cache = FragmentCache(app)
 
 # --- Supabase Configuration ---
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set as environment variables.")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+def default_backend():
+    """DATA_BACKEND=memory: an in-memory store seeded from data/*.json; else Supabase if configured."""
+    if os.environ.get("DATA_BACKEND") == "memory":
+        return MemoryBackend.from_json_dir(DATA_DIR)
+    if SUPABASE_URL and SUPABASE_KEY:
+        return create_client(SUPABASE_URL, SUPABASE_KEY)
+    return None
+
+# The data backend used by every helper below, resolved at import so that
+# `gunicorn app:app` works with either backend; create_app() can swap in
+# anything exposing the same table()/rpc() surface, such as
+# utils.memory_backend.MemoryBackend. Every backend is wrapped so its calls
+# are counted and timed per request.
+supabase: Client = trace_backend(default_backend())
+
+
+# Per-worker cache of user rows; short TTL so other workers' writes show up quickly
+user_cache = UserCache(
+    ttl=float(os.environ.get("USER_CACHE_TTL", 5)),
+    maxsize=int(os.environ.get("USER_CACHE_SIZE", 1024)),
+)
+
+# Points from quizzes and progress/streak fields are written behind the request
+# (coalesced per user, flushed every WRITE_BEHIND_INTERVAL seconds; 0 writes through)
+def flush_user_updates(batch_id, updates):
+    supabase.rpc('apply_user_updates', {'p_batch_id': batch_id, 'p_updates': updates}).execute()
+
+write_behind = WriteBehindQueue(
+    flush_user_updates,
+    interval=float(os.environ.get("WRITE_BEHIND_INTERVAL", 1.0)),
+    on_flushed=lambda usernames: [user_cache.invalidate(u) for u in usernames],
+)
+
+# Password hashing runs on a small bounded pool; logins beyond its queue are turned away as busy
+password_hasher = PasswordHasher(
+    workers=int(os.environ.get("AUTH_HASH_WORKERS", 2)),
+    max_queue=int(os.environ.get("AUTH_HASH_QUEUE", 32)),
+    method=os.environ.get("PASSWORD_HASH_METHOD", DEFAULT_HASH_METHOD),
+)
+# Login throttles (per worker): every attempt spends an IP token, failed ones a username token
+login_ip_limiter = TokenBucket(
+    capacity=int(os.environ.get("LOGIN_IP_BURST", 20)),
+    rate=float(os.environ.get("LOGIN_IP_PER_MINUTE", 30)) / 60,
+)
+login_user_limiter = TokenBucket(
+    capacity=int(os.environ.get("LOGIN_USER_BURST", 5)),
+    rate=float(os.environ.get("LOGIN_USER_PER_MINUTE", 2)) / 60,
+)
+# Longest Retry-After sent to a throttled login (a rate of 0 never refills)
+LOGIN_MAX_RETRY_AFTER = 3600
+
+# Columns the app reads from a user row (password is only ever fetched by login)
+USER_COLUMNS = "id, username, role, points, scanned_skills, skill_progress, streak, last_activity, badges, badges_earned"
 
 
 # --- Data Helpers (Now using Supabase) ---
-def get_user_by_username(username):
-    """Fetches a single user from Supabase by their username."""
+def get_user_by_username(username, fresh=False):
+    """
+    Fetches a single user by their username, served from the user cache unless fresh=True.
+    This worker's not-yet-flushed writes are applied on top.
+    """
+    if not username:
+        return None
+    cached = None if fresh else user_cache.get(username)
+    if cached is not None:
+        return write_behind.overlay(username, cached)
     # Use .execute() without .single() to avoid an error if no user is found.
-    response = supabase.table('users').select("*").eq('username', username).execute()
+    response = supabase.table('users').select(USER_COLUMNS).eq('username', username).execute()
     if response.data:
-        return response.data[0] # Return the first (and only) user found
+        user_cache.set(username, response.data[0])
+        return write_behind.overlay(username, response.data[0]) # Return the first (and only) user found
     return None # Return None if no user was found
 
-def get_all_users():
-    """Fetches all users from Supabase and returns them as a dictionary."""
-    response = supabase.table('users').select("*").execute()
-    return {u['username']: u for u in response.data}
+def get_user_credentials(username):
+    """Fetches the login fields for a user, bypassing the cache."""
+    response = supabase.table('users').select("id, username, password, role").eq('username', username).execute()
+    if response.data:
+        return response.data[0]
+    return None
 
-def get_all_cards():
-    """Fetches all cards from Supabase."""
-    response = supabase.table('cards').select("*").order('scanned_at', desc=True).execute()
-    return response.data
+def record_progress(username, event, skill_name, points=None, user_data=None):
+    """
+    Applies a claim/read/quiz/visit event to the user's stored progress and queues
+    the changed fields on the write-behind queue. Returns the updated user row.
+    """
+    return record_progress_events(username, [(event, skill_name)], points=points, user_data=user_data)
+
+def record_progress_events(username, events, points=None, user_data=None):
+    """
+    Applies several (event, skill) pairs and queues all their changes as one update.
+    `points` is the user's total after the events.
+    """
+    if user_data is None:
+        user_data = get_user_by_username(username, fresh=True)
+    if not user_data:
+        return None
+    today = datetime.now().date()
+    # The board and skill counters cover students only (as rebuilds load them), not e.g. an admin trying a quiz
+    ranked = user_data.get('role') == 'student'
+    changes = {}
+    for event, skill_name in events:
+        step = apply_event(user_data, event, skill_name, today, SKILL_CODES, points=points)
+        deep_merge(changes, step)
+        # Keep the per-skill counters in step with first-time progress
+        if ranked and 'skill_progress' in step and event in SKILL_STAT_EVENTS:
+            leaderboard.count_skill_event(skill_name, SKILL_STAT_EVENTS[event])
+    write_behind.set(username, changes)
+    if ranked and points is not None:
+        leaderboard.set_points(username, points)
+    return user_data
+
+def upgrade_password_hash(username, old, password):
+    """Rehashes a plaintext/outdated password in the background; compare-and-set, so a concurrent change wins."""
+    def store(future):
+        try:
+            supabase.rpc('set_password_hashes', {'p_rows': [{'username': username, 'old': old, 'hash': future.result()}]}).execute()
+        except Exception:
+            app.logger.exception("could not store the rehashed password for %s", username)
+    try:
+        password_hasher.hash(password).add_done_callback(store)
+    except AuthBusy:
+        pass # the next login tries again
+
+def iter_student_scores():
+    """Streams every student's points and progress in keyset pages (leaderboard rebuilds only)."""
+    def fetch_page(limit, cursor):
+        query = supabase.table('users').select("username, points, skill_progress").eq('role', 'student')
+        key = decode_cursor(cursor)
+        if key:
+            query = query.gt('username', key[0])
+        rows = query.order('username').limit(limit).execute().data
+        return rows, (encode_cursor([rows[-1]['username']]) if len(rows) == limit else None)
+    return iter_rows(fetch_page)
+
+def iter_quiz_attempts():
+    """Streams the quiz attempt log in keyset pages on id (analytics job only)."""
+    def fetch_page(limit, cursor):
+        query = supabase.table('quiz_attempts').select("id, skill_name, answers")
+        key = decode_cursor(cursor)
+        if key:
+            query = query.gt('id', key[0])
+        rows = query.order('id').limit(limit).execute().data
+        return rows, (encode_cursor([rows[-1]['id']]) if len(rows) == limit else None)
+    return iter_rows(fetch_page)
+
+CARD_LIST_COLUMNS = "id, skill_name, holder_id, scanned_at, created_at"
+USER_LIST_COLUMNS = "id, username, role, points, scanned_skills"
+
+def list_cards_page(limit=DEFAULT_PAGE_SIZE, cursor=None, skill=None, status=None, holder_id=None, id_prefix=None):
+    """
+    Fetches one page of cards, newest scan first, using keyset pagination on
+    (scanned_at, id). Filters: skill code, status ('claimed'/'unclaimed'),
+    holder id and serial prefix (one minting batch).
+    Returns (cards, next_cursor); next_cursor is None on the last page.
+    """
+    query = supabase.table('cards').select(CARD_LIST_COLUMNS)
+    if skill:
+        query = query.eq('skill_name', skill)
+    if status == 'claimed':
+        query = query.not_.is_('holder_id', 'null')
+    elif status == 'unclaimed':
+        query = query.is_('holder_id', 'null')
+    if holder_id is not None:
+        query = query.eq('holder_id', holder_id)
+    if id_prefix:
+        query = query.like('id', f"{id_prefix}%")
+    key = decode_cursor(cursor)
+    if key and len(key) == 2:
+        scanned_at, last_id = key
+        if scanned_at is None:
+            # Already into the never-scanned tail (nulls sort last)
+            query = query.is_('scanned_at', 'null').lt('id', last_id)
+        else:
+            ts, sid = quote_filter_value(scanned_at), quote_filter_value(last_id)
+            query = query.or_(f"scanned_at.lt.{ts},and(scanned_at.eq.{ts},id.lt.{sid}),scanned_at.is.null")
+    response = (query.order('scanned_at', desc=True, nullsfirst=False)
+                     .order('id', desc=True)
+                     .limit(limit + 1)
+                     .execute())
+    rows = response.data
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].get('scanned_at'), rows[-1]['id']])
+    return rows, next_cursor
+
+def list_users_page(limit=DEFAULT_PAGE_SIZE, cursor=None, role=None):
+    """Fetches one page of users ordered by username (keyset pagination). Returns (users, next_cursor)."""
+    query = supabase.table('users').select(USER_LIST_COLUMNS)
+    if role:
+        query = query.eq('role', role)
+    key = decode_cursor(cursor)
+    if key and len(key) == 1:
+        query = query.gt('username', key[0])
+    rows = query.order('username').limit(limit + 1).execute().data
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1]['username']])
+    return rows, next_cursor
+
+def get_usernames_by_ids(user_ids):
+    """Maps user ids to usernames in one batched query."""
+    user_ids = list(dict.fromkeys(i for i in user_ids if i is not None))
+    if not user_ids:
+        return {}
+    response = supabase.table('users').select("id, username").in_('id', user_ids).execute()
+    return {u['id']: u['username'] for u in response.data}
+
+def get_cards_by_ids(serials, columns="*"):
+    """Fetches only the given cards in one batched query, keyed by serial."""
+    serials = list(dict.fromkeys(s for s in serials if s))
+    if not serials:
+        return {} # Nothing held, so no round trip needed
+    response = supabase.table('cards').select(columns).in_('id', serials).execute()
+    return {c['id']: c for c in response.data}
+
+def get_cards_by_holder(user_id, columns="*"):
+    """Fetches the cards a user holds (indexed on holder_id), keyed by serial."""
+    response = supabase.table('cards').select(columns).eq('holder_id', user_id).execute()
+    return {c['id']: c for c in response.data}
 
 # All available skills
 SKILLS = [
@@ -53,6 +291,16 @@ SKILLS = [
     {"code": "leadership", "title": "Leadership", "icon": "👥", "desc": "Guide and inspire teams to achieve goals."},
     {"code": "media-literacy", "title": "Media Literacy", "icon": "📱", "desc": "Analyze and create media content critically."}
 ]
+SKILL_CODES = [s["code"] for s in SKILLS]
+
+# Which per-skill counter each progress event feeds
+SKILL_STAT_EVENTS = {'claim': 'claims', 'quiz': 'quiz_passes'}
+
+leaderboard = Leaderboard(
+    iter_student_scores,
+    SKILL_CODES,
+    refresh_seconds=float(os.environ.get("LEADERBOARD_REFRESH_SECONDS", 60)),
+)
 
 @app.route("/")
 def index():
@@ -61,11 +309,27 @@ def index():
 
 @app.route("/login", methods=["POST"])
 def login():
-    username = request.form.get("username")
-    password = request.form.get("password")
-    user = get_user_by_username(username)
-    if user and user["password"] == password:
+    username = request.form.get("username") or ""
+    password = request.form.get("password") or ""
+    # Throttled before any query or hashing, so brute-force traffic costs next to nothing
+    ip = request.remote_addr or "-"
+    if not login_ip_limiter.consume(ip) or not login_user_limiter.allowed(username):
+        flash("Too many login attempts. Please wait a minute and try again.", "error")
+        retry = min(max(login_ip_limiter.retry_after(ip), login_user_limiter.retry_after(username)), LOGIN_MAX_RETRY_AFTER)
+        return render_template("login.html", skills=SKILLS), 429, {'Retry-After': str(int(retry) + 1)}
+
+    user = get_user_credentials(username) if username else None
+    try:
+        # Unknown usernames are checked against a dummy hash so they take as long as real ones
+        valid = password_hasher.verify(user["password"] if user else password_hasher.dummy_hash(), password)
+    except AuthBusy: # queue full, or the check timed out waiting for the pool
+        flash("The server is busy. Please try again in a moment.", "error")
+        return render_template("login.html", skills=SKILLS), 503, {'Retry-After': '2'}
+    if user and valid:
+        if password_hasher.needs_rehash(user["password"]):
+            upgrade_password_hash(username, user["password"], password)
         session["user"] = username
+        session["user_id"] = user["id"] # lets views fetch the user's cards without waiting for the user row
         session["role"] = user["role"]
         flash("Login successful!", "success")
         if user["role"] == "admin":
@@ -73,6 +337,7 @@ def login():
         else:
             return redirect(url_for("student_dashboard"))
     else:
+        login_user_limiter.consume(username)
         flash("Invalid credentials.", "error")
         return redirect(url_for("index"))
 
@@ -82,27 +347,226 @@ def login():
 def admin_dashboard():
     if session.get("role") != "admin":
         return redirect(url_for("index"))
-    
-    # Fetch data from Supabase
-    all_users = get_all_users()
-    all_cards = get_all_cards()
-    
-    return render_template("admin_dashboard.html", users=all_users, cards=all_cards, skills=SKILLS)
+    # Users and cards are paged in by the page itself from the admin listing APIs
+    return render_template("admin_dashboard.html", skills=SKILLS, max_batch_size=MINT_MAX_CARDS)
+
+def card_filters_from_args(args):
+    """
+    Reads the dashboard's card filters (skill, status, holder, batch) from query args.
+    Returns None when the holder filter names a user that does not exist.
+    """
+    filters = {'skill': args.get('skill') or None, 'status': args.get('status') or None, 'holder_id': None, 'id_prefix': None}
+    batch = args.get('batch', type=int)
+    if batch and filters['skill']:
+        filters['id_prefix'] = batch_prefix(filters['skill'], batch)
+    holder = args.get('holder')
+    if holder:
+        holder_user = get_user_by_username(holder)
+        if not holder_user:
+            return None
+        filters['holder_id'] = holder_user['id']
+    return filters
+
+def with_holder_names(cards):
+    """Adds a 'holder' username to each card row with one batched lookup."""
+    holders = get_usernames_by_ids(c.get('holder_id') for c in cards)
+    for c in cards:
+        c['holder'] = holders.get(c.get('holder_id'))
+    return cards
+
+@app.route("/api/admin/cards")
+def api_admin_cards():
+    if session.get("role") != "admin":
+        return jsonify({'error': 'Admin access required'}), 403
+    filters = card_filters_from_args(request.args)
+    if filters is None:
+        return jsonify({'items': [], 'next_cursor': None})
+    cards, next_cursor = list_cards_page(
+        limit=parse_limit(request.args.get('limit')),
+        cursor=request.args.get('cursor'),
+        **filters,
+    )
+    items = []
+    for c in with_holder_names(cards):
+        items.append({
+            'id': c['id'],
+            'skill_name': c.get('skill_name'),
+            'holder': c['holder'],
+            'scanned_at': c.get('scanned_at'),
+            'created_at': c.get('created_at'),
+            'view_url': url_for('student_skill', skill_name=c.get('skill_name')),
+            'scan_url': scan_url_for(c),
+        })
+    return jsonify({'items': items, 'next_cursor': next_cursor})
+
+@app.route("/api/admin/users")
+def api_admin_users():
+    if session.get("role") != "admin":
+        return jsonify({'error': 'Admin access required'}), 403
+    users, next_cursor = list_users_page(
+        limit=parse_limit(request.args.get('limit')),
+        cursor=request.args.get('cursor'),
+        role=request.args.get('role') or None,
+    )
+    return jsonify({'items': users, 'next_cursor': next_cursor})
+
+def export_response(rows, fields, name, fmt):
+    """Streams rows as CSV or NDJSON; rows is a lazy iterator so memory stays flat."""
+    if fmt == 'csv':
+        body = stream_csv(rows, fields)
+    else:
+        body = stream_ndjson({f: row.get(f) for f in fields} for row in rows)
+    return Response(
+        stream_with_context(body),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={name}.{fmt}'},
+    )
+
+@app.route("/admin/export/cards.<fmt>")
+def admin_export_cards(fmt):
+    if session.get("role") != "admin":
+        return jsonify({'error': 'Admin access required'}), 403
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Unsupported export format'}), 404
+    filters = card_filters_from_args(request.args)
+
+    def fetch_page(limit, cursor):
+        if filters is None:
+            return [], None
+        return list_cards_page(limit=limit, cursor=cursor, **filters)
+
+    fields = ['id', 'skill_name', 'holder', 'scanned_at', 'created_at']
+    # Holder names for one page are looked up while the next page is fetched
+    return export_response(iter_rows(fetch_page, enrich=with_holder_names), fields, 'cards', fmt)
+
+@app.route("/admin/export/users.<fmt>")
+def admin_export_users(fmt):
+    if session.get("role") != "admin":
+        return jsonify({'error': 'Admin access required'}), 403
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Unsupported export format'}), 404
+    role = request.args.get('role') or None
+
+    def fetch_page(limit, cursor):
+        return list_users_page(limit=limit, cursor=cursor, role=role)
+
+    fields = ['username', 'role', 'points', 'scanned_skills']
+    return export_response(iter_rows(fetch_page), fields, 'users', fmt)
+
+def scan_url_for(card):
+    """The URL encoded in a card's QR code."""
+    return url_for('student_skill', skill_name=card['skill_name'], serial=card['id'], _external=True)
+
+@app.route("/admin/cards/<serial>/qr.<fmt>")
+def admin_card_qr(serial, fmt):
+    if session.get("role") != "admin":
+        return jsonify({'error': 'Admin access required'}), 403
+    if fmt not in QR_FORMATS:
+        return jsonify({'error': 'Unsupported image format'}), 404
+    card = get_cards_by_ids([serial], "id, skill_name").get(serial)
+    if not card:
+        return jsonify({'error': 'Card not found'}), 404
+    image = get_qr(QR_CACHE_DIR, serial, scan_url_for(card), fmt)
+    return Response(image, mimetype=QR_FORMATS[fmt], headers={'Cache-Control': 'private, max-age=86400'})
+
+@app.route("/admin/qr/sheet.pdf")
+def admin_qr_sheet():
+    """Printable QR sheet for every card matching the dashboard filters (e.g. one minting batch)."""
+    if session.get("role") != "admin":
+        return jsonify({'error': 'Admin access required'}), 403
+    filters = card_filters_from_args(request.args)
+    if filters is None or not (filters['skill'] or filters['id_prefix']):
+        return jsonify({'error': 'Choose a skill (and optionally a batch) to print'}), 400
+
+    def fetch_page(limit, cursor):
+        return list_cards_page(limit=limit, cursor=cursor, **filters)
+
+    items = []
+    for c in iter_rows(fetch_page):
+        if len(items) == QR_SHEET_MAX_CARDS:
+            return jsonify({'error': f'More than {QR_SHEET_MAX_CARDS} cards match; choose a batch to print'}), 400
+        items.append((c['id'], scan_url_for(c)))
+    items.sort()
+    title = f"{filters['skill']} {filters['id_prefix'] or ''}".strip()
+    pdf = render_sheet_pdf(QR_CACHE_DIR, items, title=title)
+    name = (filters['id_prefix'] or filters['skill']).strip('-')
+    return Response(pdf, mimetype='application/pdf', headers={'Content-Disposition': f'attachment; filename={name}.pdf'})
+
+@app.route("/admin/metrics")
+def admin_metrics():
+    """Per-route latency/query histograms for this worker."""
+    if session.get("role") != "admin":
+        return jsonify({'error': 'Admin access required'}), 403
+    return jsonify({
+        'pid': os.getpid(),
+        'routes': route_metrics.snapshot(),
+        'user_cache': user_cache.stats(),
+        'write_behind': write_behind.stats(),
+        'profiler': {'enabled': profiler.enabled, 'sample_rate': profiler.sample_rate, 'sampled': profiler.sampled},
+    })
+
+@app.route("/admin/metrics/profiler", methods=["GET", "POST"])
+def admin_profiler():
+    """GET: merged profile of sampled requests. POST {enabled, sample_rate, reset}: toggle sampling."""
+    if session.get("role") != "admin":
+        return jsonify({'error': 'Admin access required'}), 403
+    if request.method == "POST":
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        enabled = body.get('enabled', profiler.enabled)
+        if not isinstance(enabled, bool):
+            return jsonify({'error': 'enabled must be true or false'}), 400
+        sample_rate = body.get('sample_rate')
+        if sample_rate is not None:
+            if isinstance(sample_rate, bool) or not isinstance(sample_rate, (int, float)) or not 0 <= sample_rate <= 1:
+                return jsonify({'error': 'sample_rate must be a number between 0 and 1'}), 400
+        if body.get('reset'):
+            profiler.reset()
+            route_metrics.reset()
+        profiler.configure(enabled, sample_rate)
+        return jsonify({'enabled': profiler.enabled, 'sample_rate': profiler.sample_rate, 'sampled': profiler.sampled})
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime', 'calls'):
+        sort = 'cumulative'
+    return Response(profiler.report(limit=parse_limit(request.args.get('limit'), default=40), sort=sort), mimetype='text/plain')
+
+@app.route("/api/admin/quiz_analytics")
+def api_admin_quiz_analytics():
+    """Per-question stats precomputed by `flask --app app quiz-analytics`."""
+    if session.get("role") != "admin":
+        return jsonify({'error': 'Admin access required'}), 403
+    rows = supabase.table('quiz_item_stats').select("skill_name, attempts, items, computed_at").order('skill_name').execute().data
+    return jsonify({'items': rows})
+
+@app.route("/admin/cache_stats")
+def admin_cache_stats():
+    if session.get("role") != "admin":
+        return jsonify({'error': 'Admin access required'}), 403
+    return jsonify({'user_cache': user_cache.stats(), 'write_behind': write_behind.stats(), 'page_cache': page_cache.stats(), 'pid': os.getpid()})
 
 @app.route("/admin/generate", methods=["POST"])
 def admin_generate():
     if session.get("role") != "admin":
         return redirect(url_for("index"))
     skill = request.form.get("skill")
-    count = int(request.form.get("count", 5))
-    
-    # Generate new cards
-    new_cards = batch_generate_cards(skill, count)
+    count = request.form.get("count", 5, type=int)
+
+    if skill not in SKILL_CODES:
+        flash("Choose a skill.", "error")
+        return redirect(url_for('admin_dashboard'))
+    if count is None or count < 1 or count > MINT_MAX_CARDS:
+        flash(f"Choose between 1 and {MINT_MAX_CARDS} cards (use `flask --app app mint-cards` for larger batches).", "error")
+        return redirect(url_for('admin_dashboard'))
     
-    # Insert new cards into Supabase
+    # Reserve a new batch, then generate and insert cards in chunks
     try:
-        supabase.table('cards').insert(new_cards).execute()
-        flash(f"Successfully generated and saved {len(new_cards)} cards.", "success")
+        minted = mint_cards(supabase, skill, count)
+        new_cards = minted["cards"]
+        shown = f" (showing the first {len(new_cards)})" if len(new_cards) < minted["count"] else ""
+        flash(f"Successfully generated and saved {minted['count']} cards in batch {minted['batch']:03d}{shown}.", "success")
+        if minted["skipped"]:
+            flash(f"{minted['skipped']} serials already existed and were not saved again.", "error")
     except Exception as e:
         flash(f"Error saving cards to database: {e}", "error")
         # Still render the page but show an error
@@ -110,14 +574,14 @@ def admin_generate():
 
     generated = []
     for card in new_cards:
-        scan_url = url_for("student_skill", skill_name=card["skill_name"], serial=card["id"], _external=True)
+        scan_url = scan_url_for(card)
         view_url = url_for("student_skill", skill_name=card["skill_name"], _external=True)
-        generated.append({"serial": card["id"], "scan_url": scan_url, "view_url": view_url})
+        qr_url = url_for("admin_card_qr", serial=card["id"], fmt="png")
+        generated.append({"serial": card["id"], "scan_url": scan_url, "view_url": view_url, "qr_url": qr_url})
+    sheet_url = url_for("admin_qr_sheet", skill=skill, batch=minted["batch"])
 
-    # Fetch fresh data to display on the dashboard after generating
-    all_users = get_all_users()
-    all_cards = get_all_cards()
-    return render_template("admin_dashboard.html", users=all_users, generated=generated, chosen_skill=skill, cards=all_cards, skills=SKILLS)
+    # The listings reload through the paginated APIs, so no full-table refetch here
+    return render_template("admin_dashboard.html", generated=generated, sheet_url=sheet_url, chosen_skill=skill, skills=SKILLS, max_batch_size=MINT_MAX_CARDS)
 
 # Student dashboard: show scanned skills, points, QR code reader placeholder
 @app.route("/student")
@@ -125,54 +589,31 @@ def student_dashboard():
     if session.get("role") != "student":
         return redirect(url_for("index"))
     user = session.get("user")
-    user_data = get_user_by_username(user) # Fetch from Supabase
-    scanned = user_data.get("scanned_skills", [])
-    points = user_data.get("points", 0)
-    
-    # Get skill progress data
-    skill_progress = user_data.get("skill_progress", {})
-    for skill in SKILLS:
-        if skill["code"] in skill_progress:
-            # Ensure all progress fields exist
-            if "scanned" not in skill_progress[skill["code"]]:
-                skill_progress[skill["code"]]["scanned"] = skill["code"] in scanned
-            if "read" not in skill_progress[skill["code"]]:
-                skill_progress[skill["code"]]["read"] = False
-            if "quiz_taken" not in skill_progress[skill["code"]]:
-                skill_progress[skill["code"]]["quiz_taken"] = False
-        else:
-            # Initialize progress for this skill
-            skill_progress[skill["code"]] = {
-                "scanned": skill["code"] in scanned,
-                "read": False,
-                "quiz_taken": False
-            }
-    today = datetime.now().date()
-    last_activity = user_data.get("last_activity")
-    if last_activity:
-        last_activity = datetime.strptime(last_activity, "%Y-%m-%d").date()
-        if (today - last_activity).days == 1:
-            # Consecutive day
-            user_data["streak"] = user_data.get("streak", 0) + 1
-        elif (today - last_activity).days > 1:
-            # Streak broken
-            user_data["streak"] = 1
+    user_id = session.get("user_id")
+    card_columns = "id, skill_name, scanned_at"
+    if user_id is not None:
+        # The user row and the held cards are independent, so fetch them concurrently
+        user_data, cards_map = gather(
+            lambda: get_user_by_username(user),
+            lambda: get_cards_by_holder(user_id, card_columns),
+        )
     else:
-        user_data["streak"] = 1
-    
-    user_data["last_activity"] = today.strftime("%Y-%m-%d")
-    # TODO: Update user in Supabase
+        user_data, cards_map = get_user_by_username(user), {} # sessions from before user_id was stored
+    if not user_data:
+        return redirect(url_for("index"))
+    # Visiting counts towards the daily streak (queued, and only written on the first visit of a day)
+    record_progress(user, 'visit', None, user_data=user_data)
+    scanned = user_data.get("scanned_skills") or []
+    points = user_data.get("points", 0)
     
-    # Calculate badges (based on points)
-    badges_count = points // 50  # New badge every 50 points
-    if badges_count > user_data.get("badges_earned", 0):
-        user_data["badges_earned"] = badges_count
-        user_data["badges"] = [f"Badge {i+1}" for i in range(badges_count)]
-        # TODO: Update user in Supabase
+    # Progress, streak and badges are maintained by record_progress(); just read them here
+    skill_progress = normalized_skill_progress(user_data, SKILL_CODES)
     
-    # Build scanned info: map serial -> card details (skill code and title)
-    all_cards = get_all_cards()
-    cards_map = {c['id']: c for c in all_cards}
+    # Build scanned info: map serial -> card details (skill code and title).
+    # Listed serials the user doesn't hold (legacy rows) are looked up by id.
+    missing = [s for s in scanned if s not in cards_map]
+    if missing:
+        cards_map.update(get_cards_by_ids(missing, card_columns))
     scanned_info = []
     for s in scanned:
         c = cards_map.get(s)
@@ -180,27 +621,22 @@ def student_dashboard():
             # find title from SKILLS list
             title = next((x['title'] for x in SKILLS if x['code'] == c.get('skill_name')), c.get('skill_name'))
             scanned_info.append({'serial': s, 'skill_code': c.get('skill_name'), 'title': title, 'scanned_at': c.get('scanned_at')})
+            # Cards claimed before progress was recorded still unlock their skill (display only)
+            if c.get('skill_name') in skill_progress:
+                skill_progress[c['skill_name']]['scanned'] = True
         else:
             scanned_info.append({'serial': s, 'skill_code': None, 'title': s, 'scanned_at': None})
-    # Update skill progress with any newly scanned skills
-    for s in scanned:
-        card = cards_map.get(s)
-        if card:
-            skill_name = card.get('skill_name')
-            if skill_name and skill_name in skill_progress:
-                skill_progress[skill_name]['scanned'] = True
-    user_data['skill_progress'] = skill_progress
-    # TODO: Update user in Supabase
 
+    badges = user_data.get("badges") or []
     return render_template("student_dashboard.html",
         user=user,
         scanned_skills=scanned_info,
         points=points,
         skills=SKILLS,
-        badges=len(user_data.get("badges", [])),
-        user_badges=user_data.get("badges", []),
+        badges=len(badges),
+        user_badges=badges,
         skill_progress=skill_progress,
-        streak=user_data.get("streak", 0)
+        streak=current_streak(user_data, datetime.now().date())
     )
 
 
@@ -212,16 +648,30 @@ def student_skill(skill_name, serial=None):
     Users must have scanned a valid QR code to access the skill content.
     """
     user = session.get("user")
+    if not user or session.get("role") != "student":
+        return redirect(url_for("index"))
     user_data = get_user_by_username(user)
-    if not user or user_data.get("role") != "student":
+    if not user_data:
         return redirect(url_for("index"))
         
+    # If a serial was provided, claim it first (one atomic round trip) so the
+    # freshly scanned skill unlocks below
+    if serial:
+        result = claim_card(supabase, serial, user, skill=skill_name)
+        user_cache.invalidate(user)
+        if result['status'] == 'ok':
+            user_data = record_progress(user, 'claim', skill_name, points=result.get('points')) or user_data
+            flash("Skill scanned and points awarded!", "success")
+        elif result['status'] != 'already_scanned':
+            # card missing, already held, or a second card for the same skill
+            flash(CLAIM_MESSAGES.get(result['status'], "This card is invalid or already claimed."), "error")
+            return redirect(url_for("student_dashboard"))
+
     # Get user's scanned skills
-    scanned_skills = user_data.get("scanned_skills", [])
+    scanned_skills = user_data.get("scanned_skills") or []
     
-    # Check if user has access to this skill
-    all_cards = get_all_cards()
-    cards_map = {c['id']: c for c in all_cards}
+    # Check if user has access to this skill (only the user's own cards are fetched)
+    cards_map = get_cards_by_ids(scanned_skills, "id, skill_name")
     
     has_access = False
     for scanned_serial in scanned_skills:
@@ -236,41 +686,13 @@ def student_skill(skill_name, serial=None):
     if not has_access:
         return render_template('access_denied.html', skill_title=skill_title)
 
-    # If a serial was provided, try to claim it
-    if serial:
-        # Already scanned?
-        if serial in scanned_skills:
-            # If it's the same skill, grant access
-            card = cards_map.get(serial)
-            if card and card.get('skill_name') == skill_name:
-                has_access = True
-            else:
-                flash("You have already scanned this QR code.", "error")
-                return redirect(url_for("student_dashboard"))
-
-        # Find card and mark it claimed for this user
-        card_response = supabase.table('cards').select('*').eq('id', serial).single().execute()
-        card = card_response.data
-        if card and not card.get('holder'):
-            # Update card in Supabase
-            supabase.table('cards').update({
-                'holder_id': user_data['id'], 
-                'scanned_at': datetime.utcnow().isoformat()
-            }).eq('id', serial).execute()
-
-            # Update user in Supabase
-            new_points = user_data.get('points', 0) + 10
-            # TODO: Append serial to a 'scanned_serials' array field in the user table
-            supabase.table('users').update({'points': new_points}).eq('username', user).execute()
-
-            flash("Skill scanned and points awarded!", "success")
-        else:
-            # card missing or already held
-            flash("This card is invalid or already claimed.", "error")
-            return redirect(url_for("student_dashboard"))
+    # Opening the skill content counts as reading it (writes only the first time / first visit of the day)
+    record_progress(user, 'read', skill_name, user_data=user_data)
 
-    # Render the skill page (serial may be None)
-    return render_template(f'skills/{skill_name}.html', skill_name=skill_name, serial=serial, user=user)
+    # The content is shared by every student; only the nav is rendered per request.
+    # The quiz link doesn't carry the serial (the quiz never used it).
+    fragment = page_cache.get(f'skills/{skill_name}.html', skill_name, {'skill_name': skill_name, 'serial': None})
+    return fragment_response(fragment, user, session.get('role'))
 
 
 @app.route("/logout")
@@ -290,55 +712,95 @@ def api_validate_card():
     if not serial:
         return jsonify({'status': 'invalid', 'message': 'Missing serial'}), 400
     
-    card_response = supabase.table('cards').select('*').eq('id', serial).single().execute()
-    if not card_response.data:
-        return jsonify({'status': 'invalid', 'message': 'QR code is not valid.'})
-    # If the card already has a holder, it's claimed
-    if card.get('holder'):
-        # if held by current user, treat as already scanned
-        if card.get('holder') == session.get('user'):
-            return jsonify({'status': 'already_scanned', 'message': 'You already scanned this card.', 'skill': card.get('skill_name'), 'serial': serial})
-        return jsonify({'status': 'claimed', 'message': f'This card was already claimed by {card.get("holder")}.', 'skill': card.get('skill_name'), 'serial': serial})
-    # Optionally check that skill matches
-    if skill and card.get('skill_name') != skill:
-        return jsonify({'status': 'invalid', 'message': 'Skill does not match QR code.'})
-    # Check if the user already has the same skill via another serial
+    # Validate and claim in a single atomic call; the database decides the status
     user = session.get('user')
-    user_data = get_user_by_username(user)
-    existing_serials = user_data.get('scanned_skills', []) # This needs to be a field in your Supabase user table
-    for es in existing_serials:
-        if es == serial:
-            # same serial already in list (shouldn't happen because holder was None), continue
+    result = claim_card(supabase, serial, user, skill=skill)
+    user_cache.invalidate(user)
+    status = result['status']
+    payload = {'status': status, 'message': CLAIM_MESSAGES.get(status, CLAIM_MESSAGES['error']), 'skill': result.get('skill_name'), 'serial': serial}
+    if status == 'duplicate_skill':
+        payload['existing_serial'] = result.get('existing_serial')
+    if status == 'error':
+        return jsonify(payload), 403
+    if status != 'ok':
+        return jsonify(payload)
+
+    record_progress(user, 'claim', result.get('skill_name'), points=result.get('points'))
+
+    # Return the non-serial skill URL so client can redirect
+    payload['redirect'] = url_for('student_skill', skill_name=result.get('skill_name'))
+    return jsonify(payload)
+
+
+@app.route('/api/claim_batch', methods=['POST'])
+def api_claim_batch():
+    """Claims a batch of scans queued by the scanner (e.g. while offline) in one request."""
+    if session.get('role') != 'student':
+        return jsonify({'status': 'error', 'message': 'Authentication required'}), 403
+    body = request.get_json(silent=True)
+    items = body.get('scans') if isinstance(body, dict) else None
+    scans = []
+    seen = set()
+    for item in items if isinstance(items, list) else []:
+        serial = item.get('serial') if isinstance(item, dict) else item
+        if not serial or not isinstance(serial, str) or serial in seen:
             continue
-        other_card_res = supabase.table('cards').select('skill_name').eq('id', es).single().execute()
-        other_card = other_card_res.data
-        if other_card and other_card.get('skill_name') == card.get('skill_name'):
-            # user already has this skill via a different card
-            return jsonify({'status': 'duplicate_skill', 'message': 'You already have this skill from another card.', 'skill': card.get('skill_name'), 'serial': serial, 'existing_serial': es})
-    # Claim the card for the current user (atomic-ish)
+        seen.add(serial)
+        skill = item.get('skill') if isinstance(item, dict) else None
+        scans.append((serial, skill or None))
+    if not scans:
+        return jsonify({'status': 'invalid', 'message': 'No serials to claim'}), 400
+    if len(scans) > MAX_BATCH_CLAIMS:
+        return jsonify({'status': 'invalid', 'message': f'At most {MAX_BATCH_CLAIMS} scans per batch'}), 400
+
     user = session.get('user')
-    user_data = get_user_by_username(user)
-    
-    # Update card in Supabase
-    supabase.table('cards').update({
-        'holder_id': user_data['id'], 
-        'scanned_at': datetime.utcnow().isoformat()
-    }).eq('id', serial).execute()
+    rows = claim_cards(supabase, user, scans)
+    user_cache.invalidate(user)
+
+    results = []
+    claimed_skills = []
+    points = None
+    for row in rows:
+        status = row['status']
+        result = {'status': status, 'message': CLAIM_MESSAGES.get(status, CLAIM_MESSAGES['error']), 'skill': row.get('skill_name'), 'serial': row['serial']}
+        if status == 'duplicate_skill':
+            result['existing_serial'] = row.get('existing_serial')
+        if status == 'ok':
+            result['redirect'] = url_for('student_skill', skill_name=row.get('skill_name'))
+            claimed_skills.append(row.get('skill_name'))
+        results.append(result)
+        points = row.get('points', points)
+
+    if claimed_skills:
+        record_progress_events(user, [('claim', skill) for skill in claimed_skills], points=points)
+    return jsonify({'status': 'ok', 'results': results, 'points': points})
+
+@app.route('/api/leaderboard')
+def api_leaderboard():
+    if not session.get('user'):
+        return jsonify({'error': 'Authentication required'}), 403
+    limit = parse_limit(request.args.get('limit'), default=10, maximum=100)
+    return jsonify({'top': leaderboard.top(limit), 'me': leaderboard.rank_of(session.get('user'))})
 
-    # Update user in Supabase
-    new_points = user_data.get('points', 0) + 10
-    # TODO: Append serial to a 'scanned_serials' array field in the user table
-    supabase.table('users').update({'points': new_points}).eq('username', user).execute()
+@app.route('/api/leaderboard/me')
+def api_leaderboard_me():
+    if not session.get('user'):
+        return jsonify({'error': 'Authentication required'}), 403
+    return jsonify(leaderboard.rank_of(session.get('user')))
 
-    # Return the non-serial skill URL so client can redirect
-    redirect_url = url_for('student_skill', skill_name=card.get('skill_name'))
-    return jsonify({'status': 'ok', 'message': 'QR code claimed. Redirecting...', 'skill': card.get('skill_name'), 'serial': serial, 'redirect': redirect_url})
+@app.route('/api/stats/skills')
+def api_skill_stats():
+    if not session.get('user'):
+        return jsonify({'error': 'Authentication required'}), 403
+    stats = leaderboard.skill_stats()
+    return jsonify([{'code': s['code'], 'title': s['title'], **stats.get(s['code'], {})} for s in SKILLS])
 
 
 # Route to serve skill HTML pages from 'skills' folder
 @app.route('/skills/<skill_name>.html')
 def skill_html(skill_name):
-    return render_template(f'skills/{skill_name}.html')
+    fragment = page_cache.get(f'skills/{skill_name}.html', skill_name, {'skill_name': skill_name, 'serial': None})
+    return fragment_response(fragment, session.get('user'), session.get('role'))
 
 @app.route('/quiz/<skill_name>')
 def quiz(skill_name):
@@ -346,72 +808,124 @@ def quiz(skill_name):
         flash('Please log in to take the quiz.', 'error')
         return redirect(url_for('index'))
     
-    # Load quiz questions from JSON file
-    questions_path = os.path.join(DATA_DIR, 'questions.json')
+    # Questions come from the in-process cache (re-read only when the file changes)
     try:
-        with open(questions_path, 'r', encoding='utf-8') as f:
-            quizzes = json.load(f)
+        skill_quiz = quiz_bank.get(skill_name)
     except FileNotFoundError:
         flash('Quiz questions not found.', 'error')
         return redirect(url_for('student_dashboard'))
     
-    if skill_name not in quizzes:
+    if not skill_quiz:
         flash('Quiz not found for this skill.', 'error')
         return redirect(url_for('student_dashboard'))
-        
-    skill_quiz = quizzes[skill_name]
-    return render_template('quiz.html', 
-                         skill_name=skill_name,
-                         skill_title=skill_quiz['name'],
-                         description=skill_quiz['description'],
-                         questions=skill_quiz['questions'],
-                         user=session.get('user'))
+
+    # Rendered once per question-bank version; only the nav is per user
+    fragment = page_cache.get('quiz.html', skill_name, skill_quiz['context'], version=quiz_bank.version)
+    return fragment_response(fragment, session.get('user'), session.get('role'))
 
 @app.route('/submit_quiz/<skill_name>', methods=['POST'])
 def submit_quiz(skill_name):
     if not session.get('user'):
         return jsonify({'error': 'Please log in to submit the quiz.'}), 403
         
-    answers = request.json.get('answers', {})
-    # Load quiz questions for validation
-    questions_path = os.path.join(DATA_DIR, 'questions.json')
+    body = request.get_json(silent=True)
+    answers = body.get('answers', {}) if isinstance(body, dict) else None
+    if not isinstance(answers, dict):
+        return jsonify({'error': 'Expected {"answers": {question: option}}'}), 400
+    # Score against the precomputed answer key
     try:
-        with open(questions_path, 'r', encoding='utf-8') as f:
-            quizzes = json.load(f)
+        result = quiz_bank.score(skill_name, answers)
     except FileNotFoundError:
         return jsonify({'error': 'Quiz questions not found'}), 404
     
-    if skill_name not in quizzes:
-        return jsonify({'error': 'Quiz not found'}), 404
-        
-    skill_quiz = quizzes.get(skill_name)
-    if not skill_quiz:
+    if result is None:
         return jsonify({'error': 'Quiz not found'}), 404
         
-    questions = skill_quiz['questions']
-    score = 0
-    total = len(questions)
-    
-    for q_idx, question in enumerate(questions):
-        if str(q_idx) in answers and answers[str(q_idx)] == question['correct']:
-            score += 1
-            
+    score, total = result
     percentage = (score / total) * 100
     passed = percentage >= 70  # Pass threshold is 70%
-    
-    # Update user's points if passed
-    if passed:
-        user = session.get('user')
-        user_data = get_user_by_username(user)
-        supabase.table('users').update({'points': user_data.get('points', 0) + 20}).eq('username', user).execute()
-    
+
+    # Every attempt is logged; points are awarded only on the first pass per skill
+    user = session.get('user')
+    attempt = record_attempt(supabase, user, skill_name, quiz_bank.responses(skill_name, answers), score, total, passed)
+    if attempt.get('awarded'):
+        user_cache.invalidate(user)
+        record_progress(user, 'quiz', skill_name, points=attempt.get('points'))
+    elif passed:
+        record_progress(user, 'quiz', skill_name, user_data=get_user_by_username(user))
+
     return jsonify({
         'score': score,
         'total': total,
         'percentage': percentage,
         'passed': passed,
-        'points_earned': 20 if passed else 0
+        'points_earned': QUIZ_PASS_POINTS if attempt.get('awarded') else 0,
+        'already_awarded': passed and not attempt.get('awarded'),
     })
 
+@app.cli.command("hash-passwords")
+def hash_passwords_command():
+    """Hash every plaintext password in bulk (outdated hashes are upgraded at the next login)."""
+    if supabase is None:
+        create_app()
+    # The CLI has the machine to itself, so hash on every core (hashlib releases the GIL)
+    hasher = PasswordHasher(workers=os.cpu_count() or 2, max_queue=1000, method=password_hasher.method)
+    scanned = updated = 0
+    cursor = None
+    while True:
+        query = supabase.table('users').select("username, password")
+        if cursor:
+            query = query.gt('username', cursor)
+        rows = query.order('username').limit(500).execute().data
+        if not rows:
+            break
+        cursor = rows[-1]['username']
+        scanned += len(rows)
+        plaintext = [r for r in rows if r.get('password') and not is_hashed(r['password'])]
+        hashes = [hasher.hash(r['password'], wait=60) for r in plaintext]
+        batch = [{'username': r['username'], 'old': r['password'], 'hash': h.result()} for r, h in zip(plaintext, hashes)]
+        if batch:
+            updated += supabase.rpc('set_password_hashes', {'p_rows': batch}).execute().data or 0
+        print(f"{scanned} users scanned, {updated} passwords hashed")
+
+@app.cli.command("mint-cards")
+@click.argument("skill", type=click.Choice(SKILL_CODES), metavar="SKILL")
+@click.argument("count", type=click.IntRange(1, MAX_BATCH_SIZE))
+def mint_cards_command(skill, count):
+    """Mint a batch too large for one web request (the dashboard stops at MINT_MAX_CARDS)."""
+    if supabase is None:
+        create_app()
+    minted = mint_cards(supabase, skill, count)
+    print(f"batch {minted['batch']:03d}: {minted['count']} cards saved, {minted['skipped']} serials already existed")
+
+@app.cli.command("quiz-analytics")
+def quiz_analytics_command():
+    """Recompute per-question difficulty and distractor rates from the quiz attempt log."""
+    if supabase is None:
+        create_app()
+    results = compute_item_stats(iter_quiz_attempts(), quiz_bank.questions())
+    rows = [{'skill_name': skill, 'attempts': r['attempts'], 'items': r['items'], 'computed_at': datetime.now(timezone.utc).isoformat()}
+            for skill, r in results.items()]
+    supabase.table('quiz_item_stats').upsert(rows, on_conflict='skill_name').execute()
+    for skill, r in results.items():
+        print(f"{skill}: {r['attempts']} attempts ({r['stale_attempts']} stale)")
+
+def create_app(backend=None):
+    """
+    Returns the app bound to a data backend.
+    With no backend it keeps the one chosen at import (see default_backend()).
+    """
+    global supabase
+    write_behind.drain() # pending updates belong to the previous backend
+    if backend is None:
+        if supabase is None:
+            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set as environment variables (or DATA_BACKEND=memory).")
+        backend = supabase
+    supabase = trace_backend(backend)
+    # Per-worker caches belong to the previous backend
+    user_cache.clear()
+    leaderboard.invalidate()
+    return app
+
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -0,0 +1,19 @@
+"""
+ASGI entry point.
+
+    uvicorn asgi:application --workers 2
+
+a2wsgi runs each Flask request on its own thread pool of ASGI_THREADS threads
+(default 10), so one worker process holds that many in-flight I/O-bound
+requests at once instead of one per sync gunicorn worker. (asgiref's
+WsgiToAsgi would not: it runs every request on a single thread.) The WSGI
+entry point (app:app) keeps working unchanged; `gunicorn app:app --threads N`
+gives the same concurrency without ASGI.
+"""
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from app import create_app
+
+application = WSGIMiddleware(create_app(), workers=int(os.environ.get("ASGI_THREADS", 10)))
@@ -0,0 +1,193 @@
+"""
+Benchmark the hot student routes against the in-memory backend.
+
+Builds synthetic data at several card counts, drives each route through the
+Flask test client and reports p50/p99 latency plus queries per request. The
+keyset-paginated admin card listing is measured on its first page, 20 pages
+deep and with a skill/status filter.
+
+    python -m benchmarks.hot_routes                    # 1k, 10k and 100k cards
+    python -m benchmarks.hot_routes --sizes 1000 --requests 500
+
+A second table sweeps how many cards each student already holds (--holdings)
+and reports /api/validate_card, whose latency should stay flat.
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+
+from app import create_app, SKILL_CODES
+from utils.card_generator import generate_serial
+from utils.memory_backend import MemoryBackend
+
+CARDS_PER_STUDENT = 5
+
+
+def build_backend(card_count, seed=1):
+    """Synthetic school: card_count cards, one student per 10 cards, each holding up to 5 distinct skills."""
+    rng = random.Random(seed)
+    backend = MemoryBackend()
+    student_count = max(1, card_count // 10)
+    cards_by_skill = {code: [] for code in SKILL_CODES}
+    for i in range(card_count):
+        skill = SKILL_CODES[i % len(SKILL_CODES)]
+        serial = generate_serial(skill, 1 + i // len(SKILL_CODES), f"{i:06d}")
+        backend.add("cards", {"id": serial, "skill_name": skill, "created_at": "2025-09-28"})
+        cards_by_skill[skill].append(serial)
+    for n in range(student_count):
+        user = backend.add("users", {
+            "username": f"student_{n}", "password": "pass", "role": "student",
+            "points": 0, "scanned_skills": [], "skill_progress": {},
+        })
+        for skill in rng.sample(SKILL_CODES[:-1], CARDS_PER_STUDENT):
+            pool = cards_by_skill[skill]
+            if len(pool) <= 1:
+                continue
+            serial = pool.pop()
+            backend.update_row("cards", backend.tables["cards"][serial],
+                               {"holder_id": user["id"], "scanned_at": "2025-09-28T10:00:00+00:00"})
+            user["scanned_skills"].append(serial)
+            user["points"] += 10
+    backend.add("users", {"username": "admin", "password": "pass", "role": "admin"})
+    # The last skill is never pre-assigned, so its cards are free for claim benchmarks
+    return backend, student_count, cards_by_skill[SKILL_CODES[-1]]
+
+
+def login(client, backend, username):
+    with client.session_transaction() as sess:
+        sess["user"] = username
+        sess["user_id"] = backend.indexes["users"]["username"][username]
+        sess["role"] = "student"
+
+
+def measure(backend, client, requests, prepare, call):
+    """Run `requests` iterations; prepare(i) runs untimed, call(i) is timed."""
+    latencies, queries = [], []
+    for i in range(requests):
+        prepare(i)
+        backend.reset_counts()
+        start = time.perf_counter()
+        response = call(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(backend.query_count)
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return statistics.median(latencies), p99, statistics.mean(queries)
+
+
+def run(card_count, requests):
+    backend, student_count, free_cards = build_backend(card_count)
+    app = create_app(backend)
+    client = app.test_client()
+    free_skill = SKILL_CODES[-1]
+    quiz_answers = {"answers": {str(i): 0 for i in range(5)}}
+    rng = random.Random(2)
+
+    def as_random_student(i):
+        login(client, backend, f"student_{rng.randrange(student_count)}")
+
+    def fresh_claimer(offset):
+        # Each claim needs a student who lacks the free skill, so the two claim routes use disjoint halves
+        def prepare(i):
+            login(client, backend, f"student_{offset + i}")
+        return prepare
+
+    claims = iter(free_cards)
+    claim_requests = min(requests, student_count // 2, len(free_cards) // 2)
+    routes = [
+        ("/student", as_random_student, lambda i: client.get("/student")),
+        ("/skills/<skill>/<serial>", fresh_claimer(0),
+         lambda i: client.get(f"/skills/{free_skill}/{next(claims)}")),
+        ("/api/validate_card", fresh_claimer(claim_requests),
+         lambda i: client.get(f"/api/validate_card?skill={free_skill}&serial={next(claims)}")),
+        ("/quiz/<skill>", as_random_student, lambda i: client.get(f"/quiz/{free_skill}")),
+        ("/submit_quiz/<skill>", as_random_student,
+         lambda i: client.post(f"/submit_quiz/{free_skill}", json=quiz_answers)),
+    ]
+
+    def as_admin(i):
+        with client.session_transaction() as sess:
+            sess["user"], sess["role"] = "admin", "admin"
+
+    # A cursor 20 pages deep into the listing, fetched untimed
+    as_admin(0)
+    deep_cursor = None
+    for _ in range(20):
+        deep_cursor = client.get("/api/admin/cards", query_string={"cursor": deep_cursor} if deep_cursor else {}).json["next_cursor"]
+        if not deep_cursor:
+            break
+    routes += [
+        ("/api/admin/cards", as_admin, lambda i: client.get("/api/admin/cards")),
+        ("/api/admin/cards (deep)", as_admin,
+         lambda i: client.get("/api/admin/cards", query_string={"cursor": deep_cursor} if deep_cursor else {})),
+        ("/api/admin/cards (filter)", as_admin,
+         lambda i: client.get("/api/admin/cards", query_string={"skill": SKILL_CODES[0], "status": "claimed"})),
+    ]
+
+    results = []
+    for name, prepare, call in routes:
+        count = claim_requests if prepare not in (as_random_student, as_admin) else requests
+        p50, p99, qpr = measure(backend, client, count, prepare, call)
+        results.append((name, count, p50, p99, qpr))
+    return results
+
+
+def build_holdings_backend(holdings, students, card_count=10000):
+    """Every student holds `holdings` cards (none of the last skill); the last skill's cards are free to claim."""
+    backend = MemoryBackend()
+    held_skills, free_skill = SKILL_CODES[:-1], SKILL_CODES[-1]
+    free = []
+    for n in range(students):
+        user = backend.add("users", {
+            "username": f"student_{n}", "password": "pass", "role": "student",
+            "points": 0, "scanned_skills": [], "skill_progress": {},
+        })
+        for i in range(holdings):
+            skill = held_skills[i % len(held_skills)]
+            serial = generate_serial(skill, 1 + n, f"{i:06d}")
+            backend.add("cards", {"id": serial, "skill_name": skill, "created_at": "2025-09-28",
+                                  "holder_id": user["id"], "scanned_at": "2025-09-28T10:00:00+00:00"})
+            user["scanned_skills"].append(serial)
+    for i in range(max(card_count - students * holdings, students)):
+        serial = generate_serial(free_skill, 1, f"{i:06d}")
+        backend.add("cards", {"id": serial, "skill_name": free_skill, "created_at": "2025-09-28"})
+        free.append(serial)
+    return backend, free
+
+
+def run_holdings(holdings, requests):
+    backend, free = build_holdings_backend(holdings, requests)
+    client = create_app(backend).test_client()
+    claims = iter(free)
+    return measure(
+        backend, client, requests,
+        lambda i: login(client, backend, f"student_{i}"),
+        lambda i: client.get(f"/api/validate_card?skill={SKILL_CODES[-1]}&serial={next(claims)}"),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated card counts")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--holdings", default="1,10,50", help="comma-separated cards held per student")
+    args = parser.parse_args()
+    logging.getLogger("scb.requests").setLevel(logging.WARNING) # keep per-request logs out of the report
+
+    print(f"{'cards':>8}  {'route':<26} {'n':>5} {'p50 ms':>8} {'p99 ms':>8} {'queries/req':>12}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        for name, count, p50, p99, qpr in run(size, args.requests):
+            print(f"{size:>8}  {name:<26} {count:>5} {p50:>8.2f} {p99:>8.2f} {qpr:>12.2f}")
+
+    print(f"\n{'held':>8}  {'route':<26} {'n':>5} {'p50 ms':>8} {'p99 ms':>8} {'queries/req':>12}")
+    for holdings in (int(h) for h in args.holdings.split(",")):
+        p50, p99, qpr = run_holdings(holdings, args.requests)
+        print(f"{holdings:>8}  {'/api/validate_card':<26} {args.requests:>5} {p50:>8.2f} {p99:>8.2f} {qpr:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Requests per second for /quiz and /submit_quiz with the cached question bank
+versus re-reading questions.json on every request (the behaviour before the
+QuizBank cache).
+
+    python -m benchmarks.quiz_bank --requests 2000
+"""
+import argparse
+import logging
+import os
+import time
+
+import app as app_module
+from app import create_app, DATA_DIR
+from utils.memory_backend import MemoryBackend
+from utils.quiz_bank import QuizBank
+
+SKILL = "problem-solving"
+
+
+class PerRequestQuizBank(QuizBank):
+    """Parses the file on every call, as the routes did before the cache."""
+
+    def _refresh(self):
+        self._quizzes = self._load()
+        self._mtime = object() # a new version each time, so the page is re-rendered too
+
+
+def requests_per_second(client, requests, call):
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = call()
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}")
+    return requests / (time.perf_counter() - start)
+
+
+def run(bank, requests):
+    app_module.quiz_bank = bank
+    backend = MemoryBackend(users=[{"username": "student", "password": "pass", "role": "student", "points": 0}])
+    client = create_app(backend).test_client()
+    with client.session_transaction() as sess:
+        sess["user"], sess["role"] = "student", "student"
+    answers = {"answers": {str(i): 0 for i in range(5)}}
+    return (
+        requests_per_second(client, requests, lambda: client.get(f"/quiz/{SKILL}")),
+        requests_per_second(client, requests, lambda: client.post(f"/submit_quiz/{SKILL}", json=answers)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per route and variant")
+    args = parser.parse_args()
+    logging.getLogger("scb.requests").setLevel(logging.WARNING)
+
+    path = os.path.join(DATA_DIR, "questions.json")
+    original = app_module.quiz_bank
+    try:
+        before = run(PerRequestQuizBank(path), args.requests)
+        after = run(QuizBank(path), args.requests)
+    finally:
+        app_module.quiz_bank = original
+    print(f"{'route':<22} {'per-request req/s':>18} {'cached req/s':>13} {'speedup':>8}")
+    for name, b, a in zip(("/quiz/<skill>", "/submit_quiz/<skill>"), before, after):
+        print(f"{name:<22} {b:>18.0f} {a:>13.0f} {a / b:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
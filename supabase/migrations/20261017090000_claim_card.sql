@@ -0,0 +1,69 @@
+-- Atomic card claim used by /api/validate_card and /skills/<skill>/<serial>.
+--
+-- Claims the card, appends the serial to the student's scanned_skills and
+-- awards points in one transaction. Row locks on the user and the card make
+-- concurrent scans of the same printed card (or a double-tap) resolve to a
+-- single winner; every other caller gets 'claimed' or 'already_scanned'.
+--
+-- status is one of: ok, already_scanned, claimed, duplicate_skill, invalid, error
+
+create or replace function public.claim_card(
+    p_serial text,
+    p_username text,
+    p_skill text default null,
+    p_points integer default 10
+)
+returns table (status text, skill_name text, points integer, existing_serial text)
+language plpgsql
+as $$
+#variable_conflict use_column
+declare
+    v_user public.users%rowtype;
+    v_card public.cards%rowtype;
+    v_existing text;
+    v_points integer;
+begin
+    select * into v_user from public.users u where u.username = p_username for update;
+    if not found then
+        return query select 'error'::text, null::text, null::integer, null::text;
+        return;
+    end if;
+
+    select * into v_card from public.cards c where c.id = p_serial for update;
+    if not found or (p_skill is not null and v_card.skill_name <> p_skill) then
+        return query select 'invalid'::text, v_card.skill_name, v_user.points, null::text;
+        return;
+    end if;
+
+    if v_card.holder_id is not null then
+        return query select
+            (case when v_card.holder_id = v_user.id then 'already_scanned' else 'claimed' end)::text,
+            v_card.skill_name, v_user.points, null::text;
+        return;
+    end if;
+
+    -- Same skill already held through a different card?
+    select c.id into v_existing
+      from public.cards c
+     where c.id = any(coalesce(v_user.scanned_skills, '{}'))
+       and c.skill_name = v_card.skill_name
+       and c.id <> p_serial
+     limit 1;
+    if v_existing is not null then
+        return query select 'duplicate_skill'::text, v_card.skill_name, v_user.points, v_existing;
+        return;
+    end if;
+
+    update public.cards c
+       set holder_id = v_user.id, scanned_at = now()
+     where c.id = p_serial;
+
+    update public.users u
+       set points = coalesce(u.points, 0) + p_points,
+           scanned_skills = array_append(coalesce(u.scanned_skills, '{}'), p_serial)
+     where u.id = v_user.id
+    returning u.points into v_points;
+
+    return query select 'ok'::text, v_card.skill_name, v_points, null::text;
+end;
+$$;
@@ -0,0 +1,14 @@
+-- Indexes backing the keyset-paginated admin listings.
+-- Cards are paged newest-scan first on (scanned_at desc nulls last, id desc).
+
+create index if not exists cards_scanned_at_id_idx
+    on public.cards (scanned_at desc nulls last, id desc);
+
+create index if not exists cards_skill_scanned_at_id_idx
+    on public.cards (skill_name, scanned_at desc nulls last, id desc);
+
+create index if not exists cards_holder_id_idx
+    on public.cards (holder_id);
+
+create unique index if not exists users_username_idx
+    on public.users (username);
@@ -0,0 +1,29 @@
+-- Persistent batch counter for card minting, one per serial prefix.
+-- Every minting run reserves a new batch number, so serials
+-- (SCB-<SKL>-<batch>-<suffix>) never collide across runs. The counter is
+-- keyed on the <SKL> prefix rather than the skill, so two skills whose names
+-- start with the same 3 letters still draw distinct batch numbers.
+
+create table if not exists public.card_batches (
+    prefix text primary key,
+    last_batch integer not null default 0
+);
+
+-- Start past every batch number already printed (earlier runs always restarted at 001).
+insert into public.card_batches (prefix, last_batch)
+select upper(split_part(id, '-', 2)), max((split_part(id, '-', 3))::integer)
+  from public.cards
+ where split_part(id, '-', 3) ~ '^[0-9]+$'
+ group by upper(split_part(id, '-', 2))
+on conflict (prefix) do update
+   set last_batch = greatest(public.card_batches.last_batch, excluded.last_batch);
+
+create or replace function public.next_card_batch(p_prefix text)
+returns integer
+language sql
+as $$
+    insert into public.card_batches as b (prefix, last_batch)
+    values (upper(p_prefix), 1)
+    on conflict (prefix) do update set last_batch = b.last_batch + 1
+    returning b.last_batch;
+$$;
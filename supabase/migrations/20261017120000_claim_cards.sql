@@ -0,0 +1,95 @@
+-- Batch version of claim_card() for the scanner's offline queue.
+--
+-- Claims a list of serials for one student in a single transaction: the
+-- user row and all requested cards are locked up front, statuses are decided
+-- in input order (so two cards of the same skill in one batch give 'ok' then
+-- 'duplicate_skill'), and the cards and the user row are each written once.
+-- Returns one row per input serial with the same status vocabulary as
+-- claim_card(); points is the student's total after the batch.
+
+create or replace function public.claim_cards(
+    p_username text,
+    p_serials text[],
+    p_skills text[] default null,
+    p_points integer default 10
+)
+returns table (serial text, status text, skill_name text, points integer, existing_serial text)
+language plpgsql
+as $$
+#variable_conflict use_column
+declare
+    v_user public.users%rowtype;
+    v_card public.cards%rowtype;
+    v_held jsonb;
+    v_claimed text[] := '{}';
+    v_points integer;
+    v_serial text;
+    v_skill text;
+    v_status text;
+    v_existing text;
+    r_serial text[] := '{}';
+    r_status text[] := '{}';
+    r_skill text[] := '{}';
+    r_existing text[] := '{}';
+begin
+    select * into v_user from public.users u where u.username = p_username for update;
+    if not found then
+        return query select s, 'error'::text, null::text, null::integer, null::text
+                       from unnest(p_serials) as s;
+        return;
+    end if;
+
+    -- Lock every requested card in one statement, in a stable order to avoid deadlocks
+    perform 1 from public.cards c where c.id = any(p_serials) order by c.id for update;
+
+    -- skill -> serial for everything the student already holds
+    select coalesce(jsonb_object_agg(c.skill_name, c.id), '{}'::jsonb) into v_held
+      from public.cards c
+     where c.id = any(coalesce(v_user.scanned_skills, '{}'));
+
+    for i in 1 .. coalesce(array_length(p_serials, 1), 0) loop
+        v_serial := p_serials[i];
+        v_skill := case when p_skills is null then null else p_skills[i] end;
+        v_existing := null;
+        v_card := null;
+        select * into v_card from public.cards c where c.id = v_serial;
+
+        if v_card.id is null or (v_skill is not null and v_card.skill_name <> v_skill) then
+            v_status := 'invalid';
+        elsif v_serial = any(v_claimed) then
+            v_status := 'already_scanned';
+        elsif v_card.holder_id is not null then
+            v_status := case when v_card.holder_id = v_user.id then 'already_scanned' else 'claimed' end;
+        elsif v_held ? v_card.skill_name then
+            v_status := 'duplicate_skill';
+            v_existing := v_held ->> v_card.skill_name;
+        else
+            v_status := 'ok';
+            v_claimed := array_append(v_claimed, v_serial);
+            v_held := v_held || jsonb_build_object(v_card.skill_name, v_serial);
+        end if;
+
+        r_serial := array_append(r_serial, v_serial);
+        r_status := array_append(r_status, v_status);
+        r_skill := array_append(r_skill, v_card.skill_name);
+        r_existing := array_append(r_existing, v_existing);
+    end loop;
+
+    v_points := v_user.points;
+    if coalesce(array_length(v_claimed, 1), 0) > 0 then
+        update public.cards c
+           set holder_id = v_user.id, scanned_at = now()
+         where c.id = any(v_claimed);
+
+        update public.users u
+           set points = coalesce(u.points, 0) + p_points * array_length(v_claimed, 1),
+               scanned_skills = coalesce(u.scanned_skills, '{}') || v_claimed
+         where u.id = v_user.id
+        returning u.points into v_points;
+    end if;
+
+    return query
+        select t.serial, t.status, t.skill_name, v_points, t.existing_serial
+          from unnest(r_serial, r_status, r_skill, r_existing) as t(serial, status, skill_name, existing_serial);
+end;
+$$;
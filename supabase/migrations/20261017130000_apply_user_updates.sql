@@ -0,0 +1,79 @@
+-- Idempotent batch writer for the app's write-behind queue (utils/write_behind.py).
+--
+-- Each app worker coalesces non-critical user updates (streak/activity and
+-- progress fields) and sends them here as one batch with a client-generated id.
+-- The id is recorded in the same transaction as the updates, so a retried batch
+-- whose first attempt actually committed changes nothing.
+--
+-- p_updates: [{"username": ..., "set": {column: value}}]
+-- Only the progress columns below can be set (points are awarded by
+-- claim_card() and record_quiz_attempt() in their own transactions).
+-- skill_progress is merged per skill and per flag: a flag is on if it already was
+-- or the batch turns it on, so a batch cannot drop skills or flags it didn't touch.
+
+create table if not exists public.user_update_batches (
+    batch_id uuid primary key,
+    applied_at timestamptz not null default now()
+);
+
+create or replace function public.apply_user_updates(p_batch_id uuid, p_updates jsonb)
+returns boolean
+language plpgsql
+as $$
+declare
+    v_entry jsonb;
+    v_set jsonb;
+    v_progress jsonb;
+    v_skill text;
+    v_flags jsonb;
+    v_skill_entry jsonb;
+    v_flag text;
+    v_on boolean;
+    v_user public.users%rowtype;
+    v_new public.users%rowtype;
+begin
+    insert into public.user_update_batches (batch_id) values (p_batch_id)
+    on conflict (batch_id) do nothing;
+    if not found then
+        return false; -- already applied by an earlier attempt
+    end if;
+
+    -- Lock users in a stable order so concurrent workers' batches cannot deadlock
+    for v_entry in
+        select e from jsonb_array_elements(p_updates) as e order by e ->> 'username'
+    loop
+        select * into v_user from public.users u where u.username = v_entry ->> 'username' for update;
+        if not found then
+            continue;
+        end if;
+
+        v_set := coalesce(v_entry -> 'set', '{}'::jsonb);
+        if v_set ? 'skill_progress' then
+            v_progress := coalesce(to_jsonb(v_user.skill_progress), '{}'::jsonb);
+            for v_skill, v_flags in select key, value from jsonb_each(v_set -> 'skill_progress') loop
+                v_skill_entry := coalesce(v_progress -> v_skill, '{}'::jsonb);
+                for v_flag, v_on in select key, value::boolean from jsonb_each_text(v_flags) loop
+                    v_skill_entry := v_skill_entry || jsonb_build_object(
+                        v_flag, coalesce((v_skill_entry ->> v_flag)::boolean, false) or coalesce(v_on, false));
+                end loop;
+                v_progress := v_progress || jsonb_build_object(v_skill, v_skill_entry);
+            end loop;
+            v_set := jsonb_set(v_set, '{skill_progress}', v_progress);
+        end if;
+        -- Casts each value to its column's type
+        v_new := jsonb_populate_record(v_user, v_set);
+
+        update public.users u
+           set streak = v_new.streak,
+               last_activity = v_new.last_activity,
+               skill_progress = v_new.skill_progress,
+               badges = v_new.badges,
+               badges_earned = v_new.badges_earned
+         where u.id = v_user.id;
+    end loop;
+    return true;
+end;
+$$;
+
+-- Applied ids only need to outlive the retry window
+create index if not exists user_update_batches_applied_at_idx on public.user_update_batches (applied_at);
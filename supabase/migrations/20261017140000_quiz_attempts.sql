@@ -0,0 +1,88 @@
+-- Append-only quiz attempt log with one points award per student and skill.
+--
+-- record_quiz_attempt() stores every submission (answers in question order,
+-- null for skipped questions) and, on a pass, awards points only if the
+-- (username, skill) pair has no award yet. The award row and the points
+-- increment commit together, so resubmitting a passed quiz cannot farm points
+-- and concurrent submissions award at most once.
+--
+-- quiz_item_stats holds the per-question analytics computed in bulk by
+-- `flask --app app quiz-analytics`; the admin dashboard reads it as is.
+
+create table if not exists public.quiz_attempts (
+    id bigint generated always as identity primary key,
+    username text not null,
+    skill_name text not null,
+    answers smallint[] not null,
+    score integer not null,
+    total integer not null,
+    passed boolean not null,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists quiz_attempts_username_skill_idx
+    on public.quiz_attempts (username, skill_name);
+
+create table if not exists public.quiz_awards (
+    username text not null,
+    skill_name text not null,
+    attempt_id bigint references public.quiz_attempts (id),
+    points integer not null,
+    awarded_at timestamptz not null default now(),
+    primary key (username, skill_name)
+);
+
+-- Passes recorded before this log existed already earned their points
+insert into public.quiz_awards (username, skill_name, points)
+select u.username, p.key, 20
+  from public.users u,
+       jsonb_each(coalesce(to_jsonb(u.skill_progress), '{}'::jsonb)) as p
+ where (p.value ->> 'quiz_taken')::boolean
+on conflict do nothing;
+
+create table if not exists public.quiz_item_stats (
+    skill_name text primary key,
+    attempts integer not null,
+    items jsonb not null,
+    computed_at timestamptz not null default now()
+);
+
+create or replace function public.record_quiz_attempt(
+    p_username text,
+    p_skill text,
+    p_answers smallint[],
+    p_score integer,
+    p_total integer,
+    p_passed boolean,
+    p_points integer default 20
+)
+returns table (attempt_id bigint, awarded boolean, points integer)
+language plpgsql
+as $$
+#variable_conflict use_column
+declare
+    v_attempt bigint;
+    v_points integer;
+begin
+    insert into public.quiz_attempts (username, skill_name, answers, score, total, passed)
+    values (p_username, p_skill, p_answers, p_score, p_total, p_passed)
+    returning id into v_attempt;
+
+    if p_passed then
+        insert into public.quiz_awards (username, skill_name, attempt_id, points)
+        values (p_username, p_skill, v_attempt, p_points)
+        on conflict do nothing;
+        if found then
+            update public.users u
+               set points = coalesce(u.points, 0) + p_points
+             where u.username = p_username
+            returning u.points into v_points;
+            return query select v_attempt, true, v_points;
+            return;
+        end if;
+    end if;
+
+    select u.points into v_points from public.users u where u.username = p_username;
+    return query select v_attempt, false, v_points;
+end;
+$$;
@@ -0,0 +1,25 @@
+-- Compare-and-set password writes for hashing existing users.
+--
+-- Used by the login rehash (plaintext or outdated parameters) and by the bulk
+-- `flask --app app hash-passwords` migration. A row is only updated if its
+-- password still equals the value the hash was computed from, so a password
+-- changed in the meantime is never overwritten. Returns the number of rows updated.
+--
+-- p_rows: [{"username": ..., "old": <stored value>, "hash": <new hash>}]
+
+create or replace function public.set_password_hashes(p_rows jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+    v_count integer;
+begin
+    update public.users u
+       set password = r.hash
+      from jsonb_to_recordset(p_rows) as r(username text, old text, hash text)
+     where u.username = r.username
+       and u.password = r.old;
+    get diagnostics v_count = row_count;
+    return v_count;
+end;
+$$;
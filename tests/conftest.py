@@ -0,0 +1,20 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("REQUEST_LOG_LEVEL", "WARNING")
+os.environ.setdefault("WRITE_BEHIND_INTERVAL", "0") # write through, so tests see every write
+
+import pytest
+
+from app import create_app
+from tests.helpers import build_backend
+
+
+@pytest.fixture
+def make_client():
+    def make(card_count=100, **kwargs):
+        backend, serials = build_backend(card_count, **kwargs)
+        app = create_app(backend)
+        app.config["TESTING"] = True
+        return backend, app.test_client(), serials
+    return make
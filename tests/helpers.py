@@ -0,0 +1,37 @@
+"""Shared builders for the tests: a synthetic in-memory school and session login."""
+from app import SKILL_CODES
+from utils.card_generator import generate_serial
+from utils.memory_backend import MemoryBackend
+
+
+def build_backend(card_count, students=3, held_per_student=3):
+    """card_count cards spread over the skills; each student holds one card of the first few skills."""
+    backend = MemoryBackend()
+    serials = {code: [] for code in SKILL_CODES}
+    for i in range(card_count):
+        skill = SKILL_CODES[i % len(SKILL_CODES)]
+        serial = generate_serial(skill, 1, f"{i:06d}")
+        backend.add("cards", {"id": serial, "skill_name": skill, "created_at": "2025-09-28"})
+        serials[skill].append(serial)
+    for n in range(students):
+        user = backend.add("users", {
+            "username": f"student_{n}", "password": "pass", "role": "student",
+            "points": 0, "scanned_skills": [], "skill_progress": {},
+        })
+        for skill in SKILL_CODES[:held_per_student]:
+            serial = serials[skill].pop()
+            backend.update_row("cards", backend.tables["cards"][serial],
+                               {"holder_id": user["id"], "scanned_at": "2025-09-28T10:00:00+00:00"})
+            user["scanned_skills"].append(serial)
+            user["points"] += 10
+    backend.add("users", {"username": "admin", "password": "pass", "role": "admin"})
+    return backend, serials
+
+
+def login(client, backend, username):
+    user = backend.tables["users"][backend.indexes["users"]["username"][username]]
+    with client.session_transaction() as sess:
+        sess["user"] = username
+        sess["user_id"] = user["id"]
+        sess["role"] = user["role"]
+
@@ -0,0 +1,53 @@
+import math
+import threading
+
+import pytest
+
+import app as app_module
+from utils.auth import AuthBusy, PasswordHasher, TokenBucket
+
+
+def test_retry_after_without_refill():
+    bucket = TokenBucket(capacity=1, rate=0)
+    assert bucket.retry_after("ip") == 0
+    assert bucket.consume("ip")
+    assert not bucket.consume("ip")
+    assert bucket.retry_after("ip") == math.inf
+
+
+def test_verify_timeout_is_reported_as_busy():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+    blocker = hasher.submit(release.wait)
+    try:
+        with pytest.raises(AuthBusy):
+            hasher.verify("secret", "secret", timeout=0.05)
+    finally:
+        release.set()
+    blocker.result(timeout=1)
+    assert hasher.verify("secret", "secret") # the timed-out check gave its slot back
+
+
+def test_throttled_login_with_a_zero_rate_sends_retry_after(make_client, monkeypatch):
+    _, client, _ = make_client(100)
+    monkeypatch.setattr(app_module, "login_ip_limiter", TokenBucket(capacity=1, rate=0))
+    client.post("/login", data={"username": "student_0", "password": "wrong"})
+    response = client.post("/login", data={"username": "student_0", "password": "pass"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(app_module.LOGIN_MAX_RETRY_AFTER + 1)
+
+
+def test_login_is_busy_when_the_check_times_out(make_client, monkeypatch):
+    _, client, _ = make_client(100)
+    hasher = PasswordHasher(workers=1, max_queue=4)
+    monkeypatch.setattr(app_module, "password_hasher", hasher)
+    original_verify = hasher.verify
+    monkeypatch.setattr(hasher, "verify", lambda stored, password: original_verify(stored, password, timeout=0.05))
+    release = threading.Event()
+    hasher.submit(release.wait)
+    try:
+        response = client.post("/login", data={"username": "student_0", "password": "pass"})
+    finally:
+        release.set()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
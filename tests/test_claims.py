@@ -0,0 +1,69 @@
+"""claim_card under contention: exactly one claim of a serial wins."""
+import threading
+from collections import Counter
+
+import pytest
+
+from app import SKILL_CODES
+from tests.helpers import login
+from utils.claims import CLAIM_POINTS, claim_card
+from utils.memory_backend import MemoryBackend
+
+THREADS = 200
+
+
+def claim_in_parallel(backend, serial, usernames):
+    barrier = threading.Barrier(len(usernames))
+    results = [None] * len(usernames)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = claim_card(backend, serial, usernames[i])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(usernames))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return Counter(r["status"] for r in results)
+
+
+def test_parallel_claims_by_many_students_have_one_winner():
+    backend = MemoryBackend(cards=[{"id": "SCB-COM-001-AAAA", "skill_name": "communication"}])
+    users = [backend.add("users", {"username": f"s{i}", "role": "student", "points": 0, "scanned_skills": []})
+             for i in range(THREADS)]
+    statuses = claim_in_parallel(backend, "SCB-COM-001-AAAA", [u["username"] for u in users])
+    assert statuses == {"ok": 1, "claimed": THREADS - 1}
+    winners = [u for u in users if u["scanned_skills"]]
+    assert len(winners) == 1
+    assert winners[0]["points"] == CLAIM_POINTS
+    assert winners[0]["scanned_skills"] == ["SCB-COM-001-AAAA"]
+    assert backend.tables["cards"]["SCB-COM-001-AAAA"]["holder_id"] == winners[0]["id"]
+    assert sum(u["points"] for u in users) == CLAIM_POINTS
+
+
+def test_parallel_claims_by_one_student_credit_once():
+    backend = MemoryBackend(cards=[{"id": "SCB-COM-001-AAAA", "skill_name": "communication"}])
+    user = backend.add("users", {"username": "s", "role": "student", "points": 0, "scanned_skills": []})
+    statuses = claim_in_parallel(backend, "SCB-COM-001-AAAA", ["s"] * THREADS)
+    assert statuses == {"ok": 1, "already_scanned": THREADS - 1}
+    assert user["points"] == CLAIM_POINTS
+    assert user["scanned_skills"] == ["SCB-COM-001-AAAA"]
+
+
+def test_scan_url_claims_before_the_access_check(make_client):
+    backend, client, serials = make_client(100)
+    login(client, backend, "student_0")
+    skill = SKILL_CODES[-1] # not held yet
+    response = client.get(f"/skills/{skill}/{serials[skill][0]}")
+    assert response.status_code == 200
+    assert b"Start Quiz" in response.data
+
+
+@pytest.mark.parametrize("body", [[1], "SCB-COM-001-AAAA", 7, {"scans": "SCB-COM-001-AAAA"}, {"scans": 7}, {}])
+def test_claim_batch_rejects_malformed_bodies(make_client, body):
+    backend, client, _ = make_client(100)
+    login(client, backend, "student_0")
+    response = client.post("/api/claim_batch", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "invalid"
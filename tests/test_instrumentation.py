@@ -0,0 +1,42 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from tests.helpers import login
+from utils.instrumentation import SIZE_SAMPLE_ROWS, _payload_size, profiler
+
+
+def test_payload_size_is_exact_for_small_results():
+    rows = [{"id": i, "username": f"user_{i}"} for i in range(SIZE_SAMPLE_ROWS)]
+    assert _payload_size(SimpleNamespace(data=rows)) == len(json.dumps(rows))
+
+
+def test_payload_size_estimates_large_results():
+    rows = [{"id": f"SCB-COM-001-{i:04d}", "skill_name": "communication"} for i in range(5000)]
+    exact = len(json.dumps(rows))
+    assert abs(_payload_size(SimpleNamespace(data=rows)) - exact) < exact * 0.05
+
+
+@pytest.mark.parametrize("body", [{"sample_rate": "x"}, {"sample_rate": 2}, {"sample_rate": -0.1},
+                                  {"sample_rate": True}, {"enabled": "yes"}, [1]])
+def test_profiler_rejects_bad_settings(make_client, body):
+    backend, client, _ = make_client(100)
+    login(client, backend, "admin")
+    before = (profiler.enabled, profiler.sample_rate)
+    response = client.post("/admin/metrics/profiler", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+    assert (profiler.enabled, profiler.sample_rate) == before
+
+
+def test_profiler_accepts_a_sample_rate(make_client):
+    backend, client, _ = make_client(100)
+    login(client, backend, "admin")
+    before = (profiler.enabled, profiler.sample_rate)
+    try:
+        response = client.post("/admin/metrics/profiler", json={"enabled": False, "sample_rate": 0.5})
+        assert response.status_code == 200
+        assert response.get_json()["sample_rate"] == 0.5
+    finally:
+        profiler.configure(*before)
@@ -0,0 +1,75 @@
+import threading
+import time
+
+from app import leaderboard, quiz_bank
+from tests.helpers import login
+from utils.leaderboard import Leaderboard
+
+
+class SlowLoader:
+    """Counts full scans; each takes `delay` seconds and returns the current rows."""
+
+    def __init__(self, rows, delay=0.05):
+        self.rows = rows
+        self.delay = delay
+        self.scans = 0
+
+    def __call__(self):
+        self.scans += 1
+        time.sleep(self.delay)
+        return [dict(row) for row in self.rows]
+
+
+def test_concurrent_first_reads_share_one_scan():
+    loader = SlowLoader([{"username": "ana", "points": 30}, {"username": "ben", "points": 50}])
+    board = Leaderboard(loader, ["communication"])
+    barrier = threading.Barrier(20)
+    results = []
+
+    def read():
+        barrier.wait()
+        results.append(board.top(1))
+
+    threads = [threading.Thread(target=read) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loader.scans == 1
+    assert all(r == [{"rank": 1, "username": "ben", "points": 50}] for r in results)
+
+
+def test_stale_reads_are_served_while_one_refresh_runs():
+    loader = SlowLoader([{"username": "ana", "points": 30}], delay=0.2)
+    board = Leaderboard(loader, ["communication"], refresh_seconds=0)
+    board.top(1)
+    loader.rows = [{"username": "ana", "points": 90}]
+
+    start = time.monotonic()
+    stale = [board.rank_of("ana")["points"] for _ in range(50)]
+    assert time.monotonic() - start < loader.delay # nobody waited for the rescan
+    assert set(stale) == {30}
+    assert loader.scans == 2 # one background refresh despite 50 stale reads
+
+    deadline = time.monotonic() + 2
+    while board.rank_of("ana")["points"] != 90 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert board.rank_of("ana")["points"] == 90
+
+
+def test_admin_quiz_passes_stay_off_the_board(make_client):
+    backend, client, _ = make_client(100)
+    login(client, backend, "student_0")
+    client.get("/api/leaderboard") # build the board
+    skill = "problem-solving"
+    stats_before = client.get("/api/leaderboard").get_json()
+
+    login(client, backend, "admin")
+    key = {str(i): q["correct"] for i, q in enumerate(quiz_bank.get(skill)["context"]["questions"])}
+    assert client.post(f"/submit_quiz/{skill}", json={"answers": key}).get_json()["passed"]
+
+    login(client, backend, "student_0")
+    board = client.get("/api/leaderboard").get_json()
+    assert "admin" not in [entry["username"] for entry in board["top"]]
+    assert board == stats_before
+    assert leaderboard.skill_stats()[skill]["quiz_passes"] == 0
@@ -0,0 +1,35 @@
+import app as app_module
+from tests.helpers import login
+from utils.card_generator import batch_generate_cards
+from utils.memory_backend import MemoryBackend
+from utils.minting import insert_chunk, mint_cards
+
+
+def test_skills_sharing_a_prefix_draw_distinct_batches():
+    backend = MemoryBackend()
+    first = mint_cards(backend, "communication", 500)
+    second = mint_cards(backend, "community-service", 500) # also SCB-COM-
+    assert (first["batch"], second["batch"]) == (1, 2)
+    assert first["count"] == second["count"] == 500
+    assert len(backend.tables["cards"]) == 1000
+
+
+def test_inserted_count_excludes_existing_rows():
+    backend = MemoryBackend()
+    chunk = batch_generate_cards("communication", 10, batch_num=7)
+    backend.add("cards", chunk[3])
+    assert insert_chunk(backend, chunk) == 9
+    assert len(backend.tables["cards"]) == 10
+
+
+def test_generate_form_is_capped_per_request(make_client, monkeypatch):
+    backend, client, _ = make_client(100)
+    login(client, backend, "admin")
+    monkeypatch.setattr(app_module, "MINT_MAX_CARDS", 50)
+    before = len(backend.tables["cards"])
+    response = client.post("/admin/generate", data={"skill": "communication", "count": 51})
+    assert response.status_code == 302
+    assert len(backend.tables["cards"]) == before
+    response = client.post("/admin/generate", data={"skill": "communication", "count": 50})
+    assert response.status_code == 200
+    assert len(backend.tables["cards"]) == before + 50
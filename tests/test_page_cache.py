@@ -0,0 +1,42 @@
+import json
+import os
+import shutil
+
+import app as app_module
+from tests.helpers import login
+from utils.quiz_bank import QuizBank
+
+SKILL = "problem-solving"
+FAR_FUTURE = "Fri, 01 Jan 2100 00:00:00 GMT"
+
+
+def test_quiz_revalidates_by_etag_only(make_client, monkeypatch, tmp_path):
+    path = tmp_path / "questions.json"
+    shutil.copy(os.path.join(app_module.DATA_DIR, "questions.json"), path)
+    monkeypatch.setattr(app_module, "quiz_bank", QuizBank(str(path)))
+    backend, client, _ = make_client(100)
+    login(client, backend, "student_0")
+
+    first = client.get(f"/quiz/{SKILL}")
+    etag = first.headers["ETag"]
+    assert client.get(f"/quiz/{SKILL}", headers={"If-None-Match": etag}).status_code == 304
+
+    bank = json.loads(path.read_text(encoding="utf-8"))
+    bank[SKILL]["questions"][0]["question"] = "Edited question?"
+    path.write_text(json.dumps(bank), encoding="utf-8")
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10**9))
+
+    # A date after every template mtime no longer hides the edited questions
+    response = client.get(f"/quiz/{SKILL}", headers={"If-Modified-Since": FAR_FUTURE})
+    assert response.status_code == 200
+    assert b"Edited question?" in response.data
+    response = client.get(f"/quiz/{SKILL}", headers={"If-None-Match": etag, "If-Modified-Since": FAR_FUTURE})
+    assert response.status_code == 200
+
+
+def test_etag_differs_per_user(make_client):
+    backend, client, _ = make_client(100)
+    login(client, backend, "student_0")
+    etag = client.get(f"/quiz/{SKILL}").headers["ETag"]
+    login(client, backend, "student_1")
+    assert client.get(f"/quiz/{SKILL}", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app import SKILL_CODES
+from utils.memory_backend import MemoryBackend
+from utils.progress import apply_event, current_streak
+from utils.write_behind import WriteBehindQueue
+
+START = date(2026, 3, 2)
+SKILL, OTHER = SKILL_CODES[0], SKILL_CODES[1]
+
+
+def replay(events, record=None):
+    """Applies (day offset, event, skill, points) in order; returns the record and each step's changes."""
+    record = {} if record is None else record
+    steps = []
+    for offset, event, skill, points in events:
+        steps.append(apply_event(record, event, skill, START + timedelta(days=offset), SKILL_CODES, points=points))
+    return record, steps
+
+
+def test_consecutive_days_extend_the_streak():
+    record, steps = replay([
+        (0, "claim", SKILL, 10),
+        (0, "read", SKILL, None),
+        (1, "quiz", SKILL, 30),
+        (2, "visit", None, None),
+    ])
+    assert record["streak"] == 3
+    assert record["last_activity"] == (START + timedelta(days=2)).isoformat()
+    assert "streak" not in steps[1] # the second event of a day doesn't touch the streak
+    assert current_streak(record, START + timedelta(days=2)) == 3
+    assert current_streak(record, START + timedelta(days=3)) == 3 # still alive the next day
+
+
+@pytest.mark.parametrize("gap", [2, 5])
+def test_a_gap_restarts_the_streak(gap):
+    record, _ = replay([(0, "claim", SKILL, 10), (1, "read", SKILL, None)])
+    assert current_streak(record, START + timedelta(days=1 + gap)) == 0 # lapsed before the next event
+    record, steps = replay([(1 + gap, "visit", None, None)], record)
+    assert steps[0]["streak"] == 1
+    assert current_streak(record, START + timedelta(days=1 + gap)) == 1
+
+
+def test_flags_are_queued_one_at_a_time():
+    record, steps = replay([
+        (0, "claim", SKILL, 10),
+        (0, "read", SKILL, None),
+        (0, "read", SKILL, None),
+        (0, "quiz", OTHER, 30),
+    ])
+    assert steps[0]["skill_progress"] == {SKILL: {"scanned": True}}
+    assert steps[1] == {"skill_progress": {SKILL: {"read": True}}}
+    assert steps[2] == {} # already read
+    assert steps[3]["skill_progress"] == {OTHER: {"quiz_taken": True}}
+    assert record["skill_progress"][SKILL] == {"scanned": True, "read": True, "quiz_taken": False}
+    assert set(record["skill_progress"]) == set(SKILL_CODES)
+
+
+def test_badges_at_50_and_100_points():
+    record, steps = replay([
+        (0, "claim", SKILL, 40),
+        (0, "quiz", SKILL, 50),
+        (1, "claim", OTHER, 60),
+        (1, "quiz", OTHER, 99),
+        (2, "claim", SKILL_CODES[2], 100),
+    ])
+    assert "badges" not in steps[0]
+    assert steps[1]["badges"] == ["Badge 1"] and steps[1]["badges_earned"] == 1
+    assert "badges" not in steps[2] and "badges" not in steps[3]
+    assert steps[4]["badges"] == ["Badge 1", "Badge 2"] and steps[4]["badges_earned"] == 2
+    assert record["badges_earned"] == 2
+
+
+def test_stale_workers_cannot_clear_each_others_flags():
+    backend = MemoryBackend(users=[{"username": "ana", "role": "student", "points": 0}])
+
+    def flush(batch_id, updates):
+        backend.rpc("apply_user_updates", {"p_batch_id": batch_id, "p_updates": updates}).execute()
+
+    # Two workers start from the same (empty) row; one sees a claim, the other a read
+    workers = [WriteBehindQueue(flush, interval=0), WriteBehindQueue(flush, interval=0)]
+    for queue, event in zip(workers, ("claim", "read")):
+        _, steps = replay([(0, event, SKILL, None)])
+        queue.set("ana", steps[0])
+
+    stored = next(iter(backend.tables["users"].values()))["skill_progress"]
+    assert stored[SKILL] == {"scanned": True, "read": True}
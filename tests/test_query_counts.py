@@ -0,0 +1,35 @@
+"""The student hot routes issue a fixed number of cards queries whatever the table size."""
+import pytest
+
+from app import SKILL_CODES, user_cache
+from tests.helpers import login
+
+
+def cards_queries(backend, client, path):
+    user_cache.clear()
+    backend.reset_counts()
+    response = client.get(path)
+    assert response.status_code == 200
+    return backend.query_breakdown[("cards", "select")]
+
+
+@pytest.mark.parametrize("path", ["/student", f"/skills/{SKILL_CODES[0]}"])
+def test_cards_queries_independent_of_table_size(make_client, path):
+    counts = []
+    for size in (100, 5000):
+        backend, client, _ = make_client(size)
+        login(client, backend, "student_0")
+        counts.append(cards_queries(backend, client, path))
+    assert counts[0] == counts[1]
+    assert counts[0] <= 1
+
+
+def test_skill_page_access_uses_held_cards_only(make_client):
+    backend, client, _ = make_client(1000)
+    login(client, backend, "student_0")
+    user_cache.clear()
+    backend.reset_counts()
+    response = client.get(f"/skills/{SKILL_CODES[-1]}") # not held
+    assert response.status_code == 200
+    assert b"Start Quiz" not in response.data
+    assert backend.query_breakdown[("cards", "select")] <= 1
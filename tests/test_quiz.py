@@ -0,0 +1,26 @@
+import pytest
+
+from tests.helpers import login
+
+SKILL = "problem-solving"
+
+
+@pytest.mark.parametrize("value", [40000, -1, 4, 99999999999, True, "1", 1.0])
+def test_out_of_range_answers_are_logged_as_skipped(make_client, value):
+    backend, client, _ = make_client(100)
+    login(client, backend, "student_0")
+    response = client.post(f"/submit_quiz/{SKILL}", json={"answers": {"0": value, "1": 0}})
+    assert response.status_code == 200
+    attempt, = backend.tables["quiz_attempts"].values()
+    assert attempt["answers"][0] is None
+    assert attempt["answers"][1] == 0
+
+
+@pytest.mark.parametrize("body", [[1], "answers", 3, {"answers": [0, 1]}, {"answers": "0"}, {"answers": None}])
+def test_malformed_submissions_are_rejected(make_client, body):
+    backend, client, _ = make_client(100)
+    login(client, backend, "student_0")
+    response = client.post(f"/submit_quiz/{SKILL}", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+    assert not backend.tables.get("quiz_attempts")
@@ -0,0 +1,149 @@
+"""
+Password hashing and login throttling.
+
+Hashes use werkzeug's generate_password_hash (scrypt by default; the app
+takes the method from PASSWORD_HASH_METHOD). Hashing is deliberately slow, so it
+runs on a small bounded pool: at most AUTH_HASH_WORKERS hashes at once and
+AUTH_HASH_QUEUE waiting, beyond which logins are turned away as busy instead
+of piling up on the request threads. hashlib releases the GIL while hashing,
+so the pool doesn't stall other requests either.
+
+Rows still holding a plaintext password (from before hashing) verify by a
+constant-time compare and are flagged for rehashing, like hashes made with
+older parameters.
+"""
+import hmac
+import math
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_HASH_METHOD = "scrypt:32768:8:1"
+
+# Prefixes werkzeug writes before the first "$" of a hash
+HASH_PREFIXES = ("scrypt:", "pbkdf2:")
+
+
+class AuthBusy(Exception):
+    """Raised when the hashing pool's queue is full or a check waited too long in it."""
+
+
+def is_hashed(stored):
+    return bool(stored) and stored.startswith(HASH_PREFIXES) and stored.count("$") >= 2
+
+
+def needs_rehash(stored, method=DEFAULT_HASH_METHOD):
+    return not is_hashed(stored) or stored.split("$", 1)[0] != method
+
+
+def verify_password(stored, password):
+    """True if `password` matches the stored hash (or legacy plaintext)."""
+    if not stored or password is None:
+        return False
+    if is_hashed(stored):
+        return check_password_hash(stored, password)
+    return hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
+
+
+def hash_password(password, method=DEFAULT_HASH_METHOD):
+    return generate_password_hash(password, method=method)
+
+
+class PasswordHasher:
+    """Bounded pool for the slow hash work of logins and migrations."""
+
+    def __init__(self, workers=2, max_queue=32, method=DEFAULT_HASH_METHOD):
+        self.workers = workers
+        self.method = method
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._dummy = None
+
+    def _pool(self):
+        # Created on first use so each (forked) worker process gets its own threads
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="auth-hash")
+        return self._executor
+
+    def submit(self, fn, *args, wait=0):
+        """Queue fn(*args) on the pool; raises AuthBusy if no slot frees up within `wait` seconds."""
+        acquired = self._slots.acquire(timeout=wait) if wait else self._slots.acquire(blocking=False)
+        if not acquired:
+            raise AuthBusy()
+        future = self._pool().submit(fn, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def verify(self, stored, password, timeout=10):
+        """Checks a password on the pool; returns True/False, or raises AuthBusy after `timeout` seconds."""
+        future = self.submit(verify_password, stored, password)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel() # frees its slot if it never started
+            raise AuthBusy() from None
+
+    def hash(self, password, wait=0):
+        return self.submit(hash_password, password, self.method, wait=wait)
+
+    def needs_rehash(self, stored):
+        return needs_rehash(stored, self.method)
+
+    def dummy_hash(self):
+        """A hash of a random secret, checked for unknown usernames so they take as long as real ones."""
+        if self._dummy is None:
+            with self._lock:
+                if self._dummy is None:
+                    self._dummy = hash_password(secrets.token_hex(16), self.method)
+        return self._dummy
+
+
+class TokenBucket:
+    """
+    Per-key token buckets (e.g. per IP or per username) kept in this worker.
+    Each key holds up to `capacity` tokens and regains `rate` tokens per second.
+    The least recently used keys are dropped beyond `maxsize`.
+    """
+
+    def __init__(self, capacity, rate, maxsize=10000):
+        self.capacity = capacity
+        self.rate = rate
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _level(self, key, now):
+        tokens, stamp = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - stamp) * self.rate)
+
+    def allowed(self, key):
+        """True if `key` has a token left (does not spend it)."""
+        with self._lock:
+            return self._level(key, time.monotonic()) >= 1
+
+    def consume(self, key):
+        """Spends a token; returns False if there was none."""
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._level(key, now)
+            ok = tokens >= 1
+            self._buckets[key] = (tokens - 1 if ok else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return ok
+
+    def retry_after(self, key):
+        """Seconds until `key` has a token again (math.inf if it never will: rate 0)."""
+        with self._lock:
+            missing = 1 - self._level(key, time.monotonic())
+        if missing <= 0:
+            return 0
+        return missing / self.rate if self.rate else math.inf
@@ -1,31 +1,56 @@
-import random
+import secrets
 import string
 from datetime import datetime
+from itertools import islice
 
-def generate_serial(skill_code, batch_num=1):
+SUFFIX_CHARS = string.ascii_uppercase + string.digits
+SUFFIX_LENGTH = 4
+
+# Suffixes are unique within a batch; keep batches well under the suffix space
+# so rejection sampling stays cheap.
+MAX_BATCH_SIZE = len(SUFFIX_CHARS) ** SUFFIX_LENGTH // 2
+
+def random_suffix():
+    """Cryptographically random alphanumeric suffix (one random draw per suffix)."""
+    n = secrets.randbelow(len(SUFFIX_CHARS) ** SUFFIX_LENGTH)
+    chars = []
+    for _ in range(SUFFIX_LENGTH):
+        n, i = divmod(n, len(SUFFIX_CHARS))
+        chars.append(SUFFIX_CHARS[i])
+    return ''.join(chars)
+
+def skill_prefix(skill_code):
+    """The serial segment naming a skill: its first 3 letters, uppercased (COM for communication)."""
+    return skill_code[:3].upper()
+
+def generate_serial(skill_code, batch_num=1, suffix=None):
     """
     Generate a unique serial number for a skill card.
     Format: SCB-XXX-000-YYYY
     - SCB: Skills Challenge Box prefix
     - XXX: First 3 letters of skill code (e.g., COM for communication)
-    - 000: Batch number (001-999)
+    - 000: Batch number (001-999, wider once past 999)
     - YYYY: Random alphanumeric string
     """
     # Get first 3 letters of skill code, uppercase
-    skill_prefix = skill_code[:3].upper()
+    prefix = skill_prefix(skill_code)
     
     # Format batch number with leading zeros
     batch = str(batch_num).zfill(3)
     
     # Generate random string of 4 characters (letters and numbers)
-    chars = string.ascii_uppercase + string.digits
-    random_suffix = ''.join(random.choices(chars, k=4))
+    if suffix is None:
+        suffix = random_suffix()
     
     # Combine all parts
-    serial = f"SCB-{skill_prefix}-{batch}-{random_suffix}"
+    serial = f"SCB-{prefix}-{batch}-{suffix}"
     
     return serial
 
+def batch_prefix(skill_code, batch_num):
+    """Serial prefix shared by every card in one batch, e.g. SCB-COM-042-."""
+    return f"SCB-{skill_prefix(skill_code)}-{str(batch_num).zfill(3)}-"
+
 def create_card(skill_name, serial=None):
     """
     Create a new card entry with generated serial number if not provided.
@@ -41,12 +66,34 @@ def create_card(skill_name, serial=None):
         "scanned_at": None
     }
 
-def batch_generate_cards(skill_name, count=5):
+def iter_batch_cards(skill_name, count, batch_num):
+    """
+    Lazily generate `count` cards for one batch.
+    Suffixes are checked against the batch's own set, so serials never repeat
+    within a batch; batch numbers are unique per serial prefix, so they never repeat at all.
+    """
+    if count > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} cards can be minted per batch.")
+    seen = set()
+    while len(seen) < count:
+        suffix = random_suffix()
+        if suffix in seen:
+            continue # collision inside the batch, draw again
+        seen.add(suffix)
+        yield create_card(skill_name, generate_serial(skill_name, batch_num, suffix))
+
+def chunked(iterable, size):
+    """Yield lists of up to `size` items from any iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def batch_generate_cards(skill_name, count=5, batch_num=1):
     """
     Generate multiple cards for a skill.
+    All cards share one batch number and have distinct suffixes.
     """
-    cards = []
-    for i in range(count):
-        serial = generate_serial(skill_name, i + 1)
-        cards.append(create_card(skill_name, serial))
-    return cards
\ No newline at end of file
+    return list(iter_batch_cards(skill_name, count, batch_num))
@@ -0,0 +1,57 @@
+"""Card claiming backed by the claim_card() database function."""
+
+CLAIM_POINTS = 10
+
+# Messages for each status returned by claim_card(), as shown to students.
+CLAIM_MESSAGES = {
+    "ok": "QR code claimed. Redirecting...",
+    "already_scanned": "You already scanned this card.",
+    "claimed": "This card was already claimed by another student.",
+    "duplicate_skill": "You already have this skill from another card.",
+    "invalid": "QR code is not valid.",
+    "error": "Could not claim this card.",
+}
+
+
+def claim_card(client, serial, username, skill=None, points=CLAIM_POINTS):
+    """
+    Claim a card for a user in a single round trip.
+    Returns a dict with 'status', 'skill_name', 'points' and 'existing_serial'.
+    """
+    response = client.rpc("claim_card", {
+        "p_serial": serial,
+        "p_username": username,
+        "p_skill": skill,
+        "p_points": points,
+    }).execute()
+    rows = response.data or []
+    if isinstance(rows, dict):
+        rows = [rows]
+    if not rows:
+        return {"status": "error", "skill_name": None, "points": None, "existing_serial": None}
+    return rows[0]
+
+
+# Upper bound on serials accepted in one batch claim
+MAX_BATCH_CLAIMS = 100
+
+
+def claim_cards(client, username, scans, points=CLAIM_POINTS):
+    """
+    Claim several cards for a user in one round trip.
+    `scans` is a list of (serial, skill) pairs; skill may be None.
+    Returns one result dict per scan, in input order.
+    """
+    serials = [serial for serial, _ in scans]
+    skills = [skill for _, skill in scans]
+    response = client.rpc("claim_cards", {
+        "p_username": username,
+        "p_serials": serials,
+        "p_skills": skills if any(skills) else None,
+        "p_points": points,
+    }).execute()
+    rows = response.data or []
+    if len(rows) != len(serials):
+        return [{"serial": s, "status": "error", "skill_name": None, "points": None, "existing_serial": None}
+                for s in serials]
+    return rows
@@ -0,0 +1,47 @@
+"""
+Thread-pool fan-out for independent queries within one request.
+
+Database calls spend their time waiting on the network, so a view that needs
+several unrelated results can issue them at once and pay roughly the slowest
+round trip instead of the sum. Each call runs in a copy of the caller's
+context, so Flask's request/app context (and the per-request query stats) are
+visible from the pool threads.
+"""
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+_executor = None
+_lock = threading.Lock()
+
+
+def fanout_workers():
+    # Read when first needed, so a DB_FANOUT_WORKERS from .env (loaded after imports) applies
+    return int(os.environ.get("DB_FANOUT_WORKERS", 8))
+
+
+def _pool():
+    # Created on first use so each (forked) worker process gets its own threads
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=fanout_workers(), thread_name_prefix="fanout")
+    return _executor
+
+
+def gather(*calls):
+    """
+    Runs zero-argument callables concurrently and returns their results in order.
+    The first runs on the calling thread; an exception from any call is re-raised.
+    """
+    if len(calls) <= 1 or fanout_workers() <= 0:
+        return [call() for call in calls]
+    futures = [_pool().submit(contextvars.copy_context().run, call) for call in calls[1:]]
+    try:
+        first = calls[0]()
+    finally:
+        # Always wait, so no query outlives the request that issued it
+        wait(futures)
+    return [first, *(future.result() for future in futures)]
@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+
+from utils.concurrency import gather
+
+EXPORT_PAGE_SIZE = 1000
+
+# MIME types for the supported export formats
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def iter_rows(fetch_page, page_size=EXPORT_PAGE_SIZE, enrich=None):
+    """
+    Yield rows from a keyset-paginated source one page at a time.
+    fetch_page(limit, cursor) must return (rows, next_cursor).
+    enrich(rows), if given, post-processes each page (e.g. a lookup query)
+    while the next page is being fetched.
+    """
+    if enrich is None:
+        cursor = None
+        while True:
+            rows, cursor = fetch_page(page_size, cursor)
+            yield from rows
+            if not cursor:
+                break
+        return
+    rows, cursor = fetch_page(page_size, None)
+    while cursor:
+        page, (rows, cursor) = gather(lambda: enrich(rows), lambda: fetch_page(page_size, cursor))
+        yield from page
+    yield from enrich(rows)
+
+
+def stream_csv(rows, fields):
+    """Yield CSV text chunks (header first) for an iterable of dict rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        value = [_csv_value(row.get(f)) for f in fields]
+        writer.writerow(value)
+        if buffer.tell() >= 16384:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_ndjson(rows):
+    """Yield one JSON document per line for an iterable of dict rows."""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=str) + "\n"
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ";".join(str(v) for v in value)
+    return value
@@ -0,0 +1,289 @@
+"""
+Per-request instrumentation.
+
+Every database call made through the traced backend is counted, timed and
+sized (estimated from a sample of rows for large results) for the current
+request. Each response gets a Server-Timing header and a structured log line,
+and per-route histograms are kept for the admin metrics endpoint. An optional
+sampling profiler runs cProfile on a fraction of requests.
+"""
+import bisect
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+
+from flask import g, has_request_context, request
+
+logger = logging.getLogger("scb.requests")
+_stats_lock = threading.Lock()
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+# Rows serialized to estimate the size of a larger result
+SIZE_SAMPLE_ROWS = 8
+
+
+class TracedCall:
+    """Wraps a query builder; execute() is measured, every other call stays wrapped."""
+
+    def __init__(self, target, label):
+        self._target = target
+        self._label = label
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name == "execute":
+            return self._execute
+        if callable(attr):
+            def call(*args, **kwargs):
+                return _wrap(attr(*args, **kwargs), self._label)
+            return call
+        return _wrap(attr, self._label)
+
+    def _execute(self, *args, **kwargs):
+        start = time.perf_counter()
+        response = self._target.execute(*args, **kwargs)
+        record_query(self._label, time.perf_counter() - start, response)
+        return response
+
+
+def _wrap(value, label):
+    # Builders are anything that can eventually execute(); plain values pass through
+    return TracedCall(value, label) if hasattr(value, "execute") else value
+
+
+class TracedBackend:
+    """Drop-in wrapper around a Supabase client (or compatible backend)."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def table(self, name):
+        return TracedCall(self.backend.table(name), name)
+
+    def rpc(self, name, params=None, *args, **kwargs):
+        return TracedCall(self.backend.rpc(name, params, *args, **kwargs), f"rpc:{name}")
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+def trace_backend(backend):
+    if backend is None or isinstance(backend, TracedBackend):
+        return backend
+    return TracedBackend(backend)
+
+
+def _payload_size(response):
+    """
+    Approximate JSON size of a response. Large row lists are not re-serialized
+    whole: SIZE_SAMPLE_ROWS evenly spaced rows are, scaled to the row count.
+    """
+    data = getattr(response, "data", None)
+    if data is None:
+        return 0
+    try:
+        if isinstance(data, list) and len(data) > SIZE_SAMPLE_ROWS:
+            step = len(data) / SIZE_SAMPLE_ROWS
+            sample = [data[int(i * step)] for i in range(SIZE_SAMPLE_ROWS)]
+            return len(json.dumps(sample, default=str)) * len(data) // SIZE_SAMPLE_ROWS
+        return len(json.dumps(data, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def record_query(label, seconds, response):
+    if not has_request_context():
+        return # CLI jobs and background threads are not attributed to a request
+    size = _payload_size(response)
+    with _stats_lock: # fanned-out queries (utils.concurrency) record from pool threads
+        stats = g.setdefault("db_stats", {"count": 0, "seconds": 0.0, "bytes": 0, "calls": []})
+        stats["count"] += 1
+        stats["seconds"] += seconds
+        stats["bytes"] += size
+        stats["calls"].append(label)
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.total:
+            return 0
+        target, seen = q * self.total, 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self):
+        buckets = {f"le_{b}": c for b, c in zip(self.bounds, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.total,
+            "mean": (self.sum / self.total) if self.total else 0,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class RouteMetrics:
+    """Per-route histograms of latency, database calls and payload bytes for this worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, route, duration_ms, db_count, db_ms, db_bytes):
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    "latency_ms": Histogram(LATENCY_BUCKETS_MS),
+                    "db_ms": Histogram(LATENCY_BUCKETS_MS),
+                    "queries": Histogram(QUERY_BUCKETS),
+                    "db_bytes": 0,
+                }
+            entry["latency_ms"].observe(duration_ms)
+            entry["db_ms"].observe(db_ms)
+            entry["queries"].observe(db_count)
+            entry["db_bytes"] += db_bytes
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                route: {
+                    "latency_ms": e["latency_ms"].to_dict(),
+                    "db_ms": e["db_ms"].to_dict(),
+                    "queries": e["queries"].to_dict(),
+                    "db_bytes": e["db_bytes"],
+                }
+                for route, e in self._routes.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+class SamplingProfiler:
+    """Profiles a random fraction of requests with cProfile and merges the results."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.sample_rate = 0.01
+        self.sampled = 0
+        self._stats = None
+
+    def configure(self, enabled, sample_rate=None):
+        with self._lock:
+            self.enabled = bool(enabled)
+            if sample_rate is not None:
+                self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+
+    def maybe_start(self):
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return None # another profiler is already active on this thread
+        return profile
+
+    def finish(self, profile):
+        profile.disable()
+        with self._lock:
+            self.sampled += 1
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+
+    def report(self, limit=40, sort="cumulative"):
+        with self._lock:
+            if self._stats is None:
+                return "No profiled requests yet."
+            out = io.StringIO()
+            self._stats.stream = out
+            self._stats.sort_stats(sort).print_stats(limit)
+            return out.getvalue()
+
+    def reset(self):
+        with self._lock:
+            self._stats = None
+            self.sampled = 0
+
+
+route_metrics = RouteMetrics()
+profiler = SamplingProfiler()
+
+
+def init_instrumentation(app):
+    """Register the request hooks on a Flask app."""
+    if not logger.handlers:
+        # One JSON object per line on stderr, independent of the root logger's setup
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(os.environ.get("REQUEST_LOG_LEVEL", "INFO").upper())
+        logger.propagate = False
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+        g.profile = profiler.maybe_start()
+
+    @app.after_request
+    def _finish_request_timer(response):
+        started = g.pop("request_started", None)
+        if started is None:
+            return response
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profiler.finish(profile)
+        duration_ms = (time.perf_counter() - started) * 1000
+        stats = g.get("db_stats") or {"count": 0, "seconds": 0.0, "bytes": 0, "calls": []}
+        db_ms = stats["seconds"] * 1000
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+
+        response.headers["Server-Timing"] = (
+            f'db;dur={db_ms:.1f};desc="{stats["count"]} queries", '
+            f'app;dur={max(duration_ms - db_ms, 0):.1f}, total;dur={duration_ms:.1f}'
+        )
+        route_metrics.observe(route, duration_ms, stats["count"], db_ms, stats["bytes"])
+        logger.info(json.dumps({
+            "event": "request",
+            "method": request.method,
+            "route": route,
+            "status": response.status_code,
+            "duration_ms": round(duration_ms, 2),
+            "db_queries": stats["count"],
+            "db_ms": round(db_ms, 2),
+            "db_bytes": stats["bytes"],
+            "db_calls": stats["calls"],
+        }))
+        return response
@@ -0,0 +1,131 @@
+import bisect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Leaderboard:
+    """
+    In-memory class leaderboard and per-skill counters for one worker.
+
+    Scores are kept in a list sorted by (-points, username), so top-N is a
+    slice and a user's rank is a binary search. Moving a user is an insort
+    plus a delete, each shifting the list tail: O(n), but a pointer memmove
+    that stays in the microseconds for a school-sized board.
+
+    The aggregate is built from one pass over the users table and then
+    maintained from claim/quiz events. Once it is older than
+    `refresh_seconds` (so events handled by other workers are picked up),
+    reads keep serving it while a single background thread rebuilds it; only
+    the very first build makes readers wait, and then for one shared pass.
+    """
+
+    def __init__(self, loader, skill_codes, refresh_seconds=60.0):
+        self._loader = loader
+        self._skill_codes = list(skill_codes)
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock() # held by the one rebuild in progress
+        self._scores = {}
+        self._order = []
+        self._skill_stats = {}
+        self._loaded_at = None
+        self._generation = 0 # bumped by invalidate(), so a rebuild that started before it is discarded
+
+    # --- building ---
+    def _empty_stats(self):
+        return {code: {"claims": 0, "quiz_passes": 0} for code in self._skill_codes}
+
+    def _rebuild(self):
+        generation = self._generation
+        scores, stats = {}, self._empty_stats()
+        for row in self._loader():
+            scores[row["username"]] = row.get("points") or 0
+            for code, progress in (row.get("skill_progress") or {}).items():
+                if code in stats and progress:
+                    stats[code]["claims"] += bool(progress.get("scanned"))
+                    stats[code]["quiz_passes"] += bool(progress.get("quiz_taken"))
+        order = sorted((-points, username) for username, points in scores.items())
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._scores, self._order, self._skill_stats = scores, order, stats
+            self._loaded_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        loaded_at = self._loaded_at
+        if loaded_at is None:
+            # Nothing to serve yet: wait for (or run) the one build in progress
+            with self._rebuild_lock:
+                if self._loaded_at is None:
+                    self._rebuild()
+        elif time.monotonic() - loaded_at > self.refresh_seconds and self._rebuild_lock.acquire(blocking=False):
+            threading.Thread(target=self._refresh_in_background, name="leaderboard-refresh", daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            self._rebuild()
+        except Exception:
+            # Keep serving the stale board; the next read past the deadline tries again
+            logger.exception("leaderboard refresh failed")
+        finally:
+            self._rebuild_lock.release()
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = None
+
+    # --- events ---
+    def set_points(self, username, points):
+        """Move a user to their new point total."""
+        if self._loaded_at is None:
+            return # Not built yet; the first read loads current totals anyway
+        points = points or 0
+        with self._lock:
+            old = self._scores.get(username)
+            if old == points:
+                return
+            if old is not None:
+                i = bisect.bisect_left(self._order, (-old, username))
+                if i < len(self._order) and self._order[i] == (-old, username):
+                    del self._order[i]
+            self._scores[username] = points
+            bisect.insort(self._order, (-points, username))
+
+    def count_skill_event(self, skill_code, field):
+        """Bump a per-skill counter ('claims' or 'quiz_passes')."""
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            if skill_code in self._skill_stats:
+                self._skill_stats[skill_code][field] += 1
+
+    # --- queries ---
+    def top(self, n):
+        self._ensure_fresh()
+        with self._lock:
+            entries = self._order[:n]
+            result = []
+            for neg_points, username in entries:
+                # Competition ranking: ties share the rank of the first tied entry
+                rank = bisect.bisect_left(self._order, (neg_points, "")) + 1
+                result.append({"rank": rank, "username": username, "points": -neg_points})
+            return result
+
+    def rank_of(self, username):
+        """Rank, points and field size for one user, or None if unranked."""
+        self._ensure_fresh()
+        with self._lock:
+            points = self._scores.get(username)
+            if points is None:
+                return None
+            rank = bisect.bisect_left(self._order, (-points, "")) + 1
+            return {"rank": rank, "username": username, "points": points, "total": len(self._order)}
+
+    def skill_stats(self):
+        self._ensure_fresh()
+        with self._lock:
+            return {code: dict(counts) for code, counts in self._skill_stats.items()}
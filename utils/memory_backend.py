@@ -0,0 +1,633 @@
+"""
+In-memory stand-in for the Supabase client.
+
+Implements the subset of the supabase-py query surface the app uses
+(table().select/insert/upsert/update/delete, eq/neq/gt/gte/lt/lte/in_/is_/like,
+not_, or_, order, limit, execute) plus the database functions from
+supabase/migrations as Python RPCs. Every execute() is counted, so it can be
+used to measure queries per request offline.
+"""
+import bisect
+import copy
+import fnmatch
+import heapq
+import json
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+
+class MemoryBackendError(Exception):
+    """Raised where PostgREST would return an error (e.g. duplicate primary key)."""
+
+
+class MemoryResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _coerce(stored, value):
+    """Convert a filter value to the stored column's type, as PostgREST would."""
+    if isinstance(stored, bool) and isinstance(value, str):
+        return value.lower() == "true"
+    if isinstance(stored, int) and isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _compare(op, stored, value):
+    if op == "is":
+        if value in (None, "null"):
+            return stored is None
+        if isinstance(value, str):
+            value = value.lower() == "true"
+        return stored is value
+    if stored is None:
+        return False # SQL NULL never matches a comparison
+    value = _coerce(stored, value)
+    if op == "eq":
+        return stored == value
+    if op == "neq":
+        return stored != value
+    if op == "gt":
+        return stored > value
+    if op == "gte":
+        return stored >= value
+    if op == "lt":
+        return stored < value
+    if op == "lte":
+        return stored <= value
+    if op == "like":
+        return fnmatch.fnmatchcase(str(stored), value.replace("%", "*").replace("_", "?"))
+    if op == "in":
+        return stored in [_coerce(stored, v) for v in value]
+    raise MemoryBackendError(f"Unsupported operator: {op}")
+
+
+def _split_top_level(expr):
+    """Split an or=() expression on commas that are not inside parentheses or quotes."""
+    parts, depth, quoted, start, i = [], 0, False, 0, 0
+    while i < len(expr):
+        ch = expr[i]
+        if quoted:
+            if ch == "\\":
+                i += 1
+            elif ch == '"':
+                quoted = False
+        elif ch == '"':
+            quoted = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(expr[start:i])
+            start = i + 1
+        i += 1
+    parts.append(expr[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def _parse_condition(expr):
+    """Turn one PostgREST logical-filter term into a predicate over a row."""
+    for group in ("and", "or"):
+        if expr.startswith(group + "(") and expr.endswith(")"):
+            terms = [_parse_condition(t) for t in _split_top_level(expr[len(group) + 1:-1])]
+            combine = all if group == "and" else any
+            return lambda row: combine(t(row) for t in terms)
+    negate = False
+    column, op, value = expr.split(".", 2)
+    if op == "not":
+        negate = True
+        op, value = value.split(".", 1)
+    value = _unquote(value)
+    if op == "is" and value == "null":
+        value = None
+
+    def predicate(row):
+        result = _compare(op, row.get(column), value)
+        return not result if negate else result
+    return predicate
+
+
+class _Descending:
+    """Sort key wrapper that reverses the order of one column."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+class MemoryQuery:
+    def __init__(self, backend, table):
+        self._backend = backend
+        self._table = table
+        self._op = "select"
+        self._columns = "*"
+        self._count = None
+        self._payload = None
+        self._on_conflict = "id"
+        self._ignore_duplicates = False
+        self._filters = []
+        self._orders = []
+        self._limit = None
+        self._negate_next = False
+        self._id_keys = None # primary-key lookup from eq/in_ on "id", like an index scan
+        self._id_after = None # lower bound from gt/gte on "id", for primary-key range scans
+
+    # --- operations ---
+    def select(self, columns="*", count=None, **_):
+        self._columns, self._count = columns, count
+        return self
+
+    def insert(self, rows, **_):
+        self._op, self._payload = "insert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict="id", ignore_duplicates=False, **_):
+        self._op, self._payload = "upsert", rows if isinstance(rows, list) else [rows]
+        self._on_conflict, self._ignore_duplicates = on_conflict, ignore_duplicates
+        return self
+
+    def update(self, fields, **_):
+        self._op, self._payload = "update", fields
+        return self
+
+    def delete(self, **_):
+        self._op = "delete"
+        return self
+
+    # --- filters ---
+    @property
+    def not_(self):
+        self._negate_next = True
+        return self
+
+    def _add(self, predicate):
+        if self._negate_next:
+            self._negate_next = False
+            self._filters.append(lambda row, p=predicate: not p(row))
+        else:
+            self._filters.append(predicate)
+        return self
+
+    def _filter(self, op, column, value):
+        return self._add(lambda row: _compare(op, row.get(column), value))
+
+    def _note_keys(self, column, keys):
+        if self._negate_next:
+            return
+        if column == "id":
+            keys = set(keys)
+        elif column in self._backend.unique_columns.get(self._table, ()):
+            index = self._backend.indexes[self._table][column]
+            keys = {index[k] for k in keys if k in index}
+        elif column in self._backend.indexed_columns.get(self._table, ()):
+            index = self._backend.multi_indexes[self._table][column]
+            keys = set().union(*(index.get(k, ()) for k in keys))
+        else:
+            return
+        self._id_keys = keys if self._id_keys is None else self._id_keys & keys
+
+    def eq(self, column, value):
+        self._note_keys(column, [value])
+        return self._filter("eq", column, value)
+
+    def neq(self, column, value):
+        return self._filter("neq", column, value)
+
+    def gt(self, column, value):
+        if column == "id" and not self._negate_next:
+            self._id_after = (value, False)
+        return self._filter("gt", column, value)
+
+    def gte(self, column, value):
+        if column == "id" and not self._negate_next:
+            self._id_after = (value, True)
+        return self._filter("gte", column, value)
+
+    def lt(self, column, value):
+        return self._filter("lt", column, value)
+
+    def lte(self, column, value):
+        return self._filter("lte", column, value)
+
+    def like(self, column, pattern):
+        return self._filter("like", column, pattern)
+
+    def in_(self, column, values):
+        values = list(values)
+        self._note_keys(column, values)
+        return self._filter("in", column, values)
+
+    def is_(self, column, value):
+        return self._filter("is", column, value)
+
+    def or_(self, filters, **_):
+        return self._add(_parse_condition(f"or({filters})"))
+
+    def order(self, column, desc=False, nullsfirst=None, **_):
+        # PostgreSQL default: NULLs sort last ascending and first descending
+        self._orders.append((column, desc, desc if nullsfirst is None else nullsfirst))
+        return self
+
+    def limit(self, size, **_):
+        self._limit = size
+        return self
+
+    # --- execution ---
+    def _matches(self, table):
+        if self._id_keys is not None:
+            rows = [table[k] for k in self._id_keys if k in table]
+        else:
+            rows = table.values()
+        return [r for r in rows if all(f(r) for f in self._filters)]
+
+    def _id_range_scan(self, table):
+        """Rows in primary-key order from the gt/gte bound, stopping at the limit (keyset pages on id)."""
+        keys = sorted(table)
+        start = 0
+        if self._id_after is not None:
+            value, inclusive = self._id_after
+            value = _coerce(keys[0], value) if keys else value
+            start = (bisect.bisect_left if inclusive else bisect.bisect_right)(keys, value)
+        rows = []
+        for key in keys[start:]:
+            row = table[key]
+            if all(f(row) for f in self._filters):
+                rows.append(row)
+                if len(rows) == self._limit:
+                    break
+        return rows
+
+    def _sort_key(self, row):
+        key = []
+        for column, desc, nullsfirst in self._orders:
+            value = row.get(column)
+            if value is None:
+                key.append((0 if nullsfirst else 2, None))
+            else:
+                key.append((1, _Descending(value) if desc else value))
+        return key
+
+    def _sorted(self, rows):
+        if not self._orders:
+            return list(rows)
+        if self._limit is not None and not self._count:
+            # Only the first `limit` rows are returned, so select them instead of sorting everything
+            return heapq.nsmallest(self._limit, rows, key=self._sort_key)
+        return sorted(rows, key=self._sort_key)
+
+    def _project(self, row):
+        if self._columns.strip() == "*":
+            return copy.deepcopy(row)
+        return {c.strip(): copy.deepcopy(row.get(c.strip())) for c in self._columns.split(",")}
+
+    def execute(self):
+        backend = self._backend
+        with backend.lock:
+            backend.count_query(self._table, self._op)
+            table = backend.tables.setdefault(self._table, {})
+            if self._op == "select":
+                if self._id_keys is None and self._orders == [("id", False, False)] and self._limit and not self._count:
+                    rows = self._id_range_scan(table)
+                else:
+                    rows = self._sorted(self._matches(table))
+                count = len(rows) if self._count else None
+                if self._limit is not None:
+                    rows = rows[:self._limit]
+                return MemoryResponse([self._project(r) for r in rows], count)
+            if self._op in ("insert", "upsert"):
+                inserted = []
+                column = self._on_conflict if self._op == "upsert" else "id"
+                for row in self._payload:
+                    row = backend.with_defaults(self._table, copy.deepcopy(row))
+                    if column == "id":
+                        existing = table.get(row["id"])
+                    else:
+                        existing = next((r for r in table.values() if r.get(column) == row.get(column)), None)
+                    if existing is not None:
+                        if self._op == "insert":
+                            raise MemoryBackendError(f"duplicate key value violates unique constraint on {self._table}.id")
+                        if self._ignore_duplicates:
+                            continue
+                        backend.update_row(self._table, existing, row)
+                        inserted.append(copy.deepcopy(existing))
+                        continue
+                    table[row["id"]] = row
+                    backend.index_row(self._table, row)
+                    inserted.append(copy.deepcopy(row))
+                return MemoryResponse(inserted)
+            if self._op == "update":
+                rows = self._matches(table)
+                for row in rows:
+                    backend.update_row(self._table, row, copy.deepcopy(self._payload))
+                return MemoryResponse([copy.deepcopy(r) for r in rows])
+            if self._op == "delete":
+                rows = self._matches(table)
+                for row in rows:
+                    backend.unindex_row(self._table, row)
+                    del table[row["id"]]
+                return MemoryResponse(rows)
+        raise MemoryBackendError(f"Unsupported operation: {self._op}")
+
+
+class MemoryRpc:
+    def __init__(self, backend, name, params):
+        self._backend = backend
+        self._name = name
+        self._params = params or {}
+
+    def execute(self):
+        backend = self._backend
+        function = backend.functions.get(self._name)
+        if function is None:
+            raise MemoryBackendError(f"Unknown function: {self._name}")
+        with backend.lock:
+            backend.count_query("rpc", self._name)
+            return MemoryResponse(function(backend, **self._params))
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _find_user(backend, username):
+    user_id = backend.indexes["users"]["username"].get(username)
+    return backend.tables["users"].get(user_id)
+
+
+def _held_skills(backend, user):
+    cards = backend.tables["cards"]
+    held = {}
+    for serial in user.get("scanned_skills") or []:
+        card = cards.get(serial)
+        if card:
+            held[card["skill_name"]] = serial
+    return held
+
+
+def rpc_claim_card(backend, p_serial, p_username, p_skill=None, p_points=10):
+    """Python twin of supabase/migrations/*_claim_card.sql (runs under the backend lock)."""
+    user = _find_user(backend, p_username)
+    if user is None:
+        return [{"status": "error", "skill_name": None, "points": None, "existing_serial": None}]
+    card = backend.tables["cards"].get(p_serial)
+    row = {"status": None, "skill_name": card and card["skill_name"], "points": user.get("points") or 0, "existing_serial": None}
+    if card is None or (p_skill is not None and card["skill_name"] != p_skill):
+        row["status"] = "invalid"
+    elif card.get("holder_id") is not None:
+        row["status"] = "already_scanned" if card["holder_id"] == user["id"] else "claimed"
+    else:
+        existing = _held_skills(backend, user).get(card["skill_name"])
+        if existing and existing != p_serial:
+            row["status"], row["existing_serial"] = "duplicate_skill", existing
+        else:
+            backend.update_row("cards", card, {"holder_id": user["id"], "scanned_at": _now()})
+            user["points"] = (user.get("points") or 0) + p_points
+            user["scanned_skills"] = list(user.get("scanned_skills") or []) + [p_serial]
+            row["status"], row["points"] = "ok", user["points"]
+    return [row]
+
+
+def rpc_claim_cards(backend, p_username, p_serials, p_skills=None, p_points=10):
+    """Python twin of supabase/migrations/*_claim_cards.sql."""
+    user = _find_user(backend, p_username)
+    if user is None:
+        return [{"serial": s, "status": "error", "skill_name": None, "points": None, "existing_serial": None}
+                for s in p_serials]
+    cards = backend.tables["cards"]
+    held = _held_skills(backend, user)
+    claimed, results = [], []
+    for i, serial in enumerate(p_serials):
+        skill = p_skills[i] if p_skills else None
+        card = cards.get(serial)
+        result = {"serial": serial, "status": None, "skill_name": card and card["skill_name"], "existing_serial": None}
+        if card is None or (skill is not None and card["skill_name"] != skill):
+            result["status"] = "invalid"
+        elif serial in claimed:
+            result["status"] = "already_scanned"
+        elif card.get("holder_id") is not None:
+            result["status"] = "already_scanned" if card["holder_id"] == user["id"] else "claimed"
+        elif card["skill_name"] in held:
+            result["status"], result["existing_serial"] = "duplicate_skill", held[card["skill_name"]]
+        else:
+            result["status"] = "ok"
+            claimed.append(serial)
+            held[card["skill_name"]] = serial
+        results.append(result)
+    now = _now()
+    for serial in claimed:
+        backend.update_row("cards", cards[serial], {"holder_id": user["id"], "scanned_at": now})
+    if claimed:
+        user["points"] = (user.get("points") or 0) + p_points * len(claimed)
+        user["scanned_skills"] = list(user.get("scanned_skills") or []) + claimed
+    for result in results:
+        result["points"] = user.get("points") or 0
+    return results
+
+
+def rpc_next_card_batch(backend, p_prefix):
+    """Python twin of next_card_batch(): bump and return the serial prefix's batch counter."""
+    batches = backend.tables.setdefault("card_batches", {})
+    prefix = p_prefix.upper()
+    row = batches.setdefault(prefix, {"id": prefix, "prefix": prefix, "last_batch": 0})
+    row["last_batch"] += 1
+    return row["last_batch"]
+
+
+def _merge_skill_progress(stored, updates):
+    """Per skill and flag, as in SQL: a flag is on if it was on before or the update turns it on."""
+    merged = {skill: dict(flags) for skill, flags in (stored or {}).items() if isinstance(flags, dict)}
+    for skill, flags in (updates or {}).items():
+        entry = merged.setdefault(skill, {})
+        for flag, value in (flags or {}).items():
+            entry[flag] = bool(entry.get(flag)) or bool(value)
+    return merged
+
+
+# Columns apply_user_updates() may set (everything else in "set" is ignored, as in SQL)
+USER_UPDATE_FIELDS = ("streak", "last_activity", "skill_progress", "badges", "badges_earned")
+
+
+def rpc_apply_user_updates(backend, p_batch_id, p_updates):
+    """Python twin of apply_user_updates(): applies a write-behind batch once per batch id."""
+    batches = backend.tables.setdefault("user_update_batches", {})
+    if p_batch_id in batches:
+        return False
+    batches[p_batch_id] = {"id": p_batch_id, "batch_id": p_batch_id, "applied_at": _now()}
+    for entry in p_updates:
+        user = _find_user(backend, entry["username"])
+        if user is None:
+            continue
+        fields = copy.deepcopy(entry.get("set") or {})
+        if "skill_progress" in fields:
+            fields["skill_progress"] = _merge_skill_progress(user.get("skill_progress"), fields["skill_progress"])
+        user.update({k: v for k, v in fields.items() if k in USER_UPDATE_FIELDS})
+    return True
+
+
+SMALLINT_MIN, SMALLINT_MAX = -32768, 32767
+
+
+def rpc_record_quiz_attempt(backend, p_username, p_skill, p_answers, p_score, p_total, p_passed, p_points=20):
+    """Python twin of record_quiz_attempt(): log the attempt, award points once per (user, skill)."""
+    if any(a is not None and not SMALLINT_MIN <= a <= SMALLINT_MAX for a in p_answers):
+        raise MemoryBackendError("smallint out of range") # p_answers is smallint[] in SQL
+    attempt = backend.add("quiz_attempts", {
+        "username": p_username, "skill_name": p_skill, "answers": list(p_answers), "score": p_score,
+        "total": p_total, "passed": p_passed, "created_at": _now(),
+    })
+    user = _find_user(backend, p_username)
+    awards = backend.tables.setdefault("quiz_awards", {})
+    key = f"{p_username}:{p_skill}"
+    if p_passed and key not in awards:
+        awards[key] = {"id": key, "username": p_username, "skill_name": p_skill, "attempt_id": attempt["id"],
+                       "points": p_points, "awarded_at": _now()}
+        if user is not None:
+            user["points"] = (user.get("points") or 0) + p_points
+        return [{"attempt_id": attempt["id"], "awarded": True, "points": user and user["points"]}]
+    return [{"attempt_id": attempt["id"], "awarded": False, "points": user and user.get("points")}]
+
+
+def rpc_set_password_hashes(backend, p_rows):
+    """Python twin of set_password_hashes(): compare-and-set each user's password."""
+    updated = 0
+    for row in p_rows:
+        user = _find_user(backend, row["username"])
+        if user is not None and user.get("password") == row["old"]:
+            user["password"] = row["hash"]
+            updated += 1
+    return updated
+
+
+class MemoryBackend:
+    """Dict-of-dicts tables keyed by primary key, guarded by one lock."""
+
+    functions = {
+        "claim_card": rpc_claim_card,
+        "claim_cards": rpc_claim_cards,
+        "next_card_batch": rpc_next_card_batch,
+        "apply_user_updates": rpc_apply_user_updates,
+        "record_quiz_attempt": rpc_record_quiz_attempt,
+        "set_password_hashes": rpc_set_password_hashes,
+    }
+
+    # Unique secondary columns looked up by value instead of scanning the table
+    unique_columns = {"users": ("username",)}
+    # Non-unique indexed columns (value -> set of ids), mirroring the SQL indexes
+    indexed_columns = {"cards": ("holder_id",)}
+
+    def __init__(self, users=(), cards=()):
+        self.lock = threading.RLock()
+        self.tables = {"users": {}, "cards": {}}
+        self.indexes = {table: {column: {} for column in columns} for table, columns in self.unique_columns.items()}
+        self.multi_indexes = {table: {column: {} for column in columns} for table, columns in self.indexed_columns.items()}
+        self._next_id = {}
+        self.query_count = 0
+        self.query_breakdown = Counter()
+        for user in users:
+            self.add("users", user)
+        for card in cards:
+            self.add("cards", card)
+
+    @classmethod
+    def from_json_dir(cls, data_dir):
+        """Seed from the demo data/users.json and data/cards.json files."""
+        with open(os.path.join(data_dir, "users.json"), encoding="utf-8") as f:
+            users = json.load(f)["users"]
+        with open(os.path.join(data_dir, "cards.json"), encoding="utf-8") as f:
+            cards = json.load(f)["cards"]
+        backend = cls(users=users)
+        ids = {u["username"]: u["id"] for u in backend.tables["users"].values()}
+        for card in cards:
+            card = dict(card)
+            card["holder_id"] = ids.get(card.pop("holder", None))
+            backend.add("cards", card)
+        backend.seed_card_batches()
+        return backend
+
+    def seed_card_batches(self):
+        """Start each prefix's batch counter past the batches already printed, as the migration does."""
+        batches = self.tables.setdefault("card_batches", {})
+        for card in self.tables["cards"].values():
+            parts = str(card["id"]).split("-")
+            if len(parts) < 3 or not parts[2].isdigit():
+                continue
+            prefix = parts[1].upper()
+            row = batches.setdefault(prefix, {"id": prefix, "prefix": prefix, "last_batch": 0})
+            row["last_batch"] = max(row["last_batch"], int(parts[2]))
+
+    def with_defaults(self, table, row):
+        if "id" not in row or row["id"] is None:
+            self._next_id[table] = self._next_id.get(table, 0) + 1
+            row["id"] = self._next_id[table]
+        if table == "cards":
+            row.setdefault("holder_id", None)
+            row.setdefault("scanned_at", None)
+        return row
+
+    def add(self, table, row):
+        """Insert a row directly (seeding); not counted as a query."""
+        with self.lock:
+            row = self.with_defaults(table, copy.deepcopy(row))
+            self.tables.setdefault(table, {})[row["id"]] = row
+            self.index_row(table, row)
+            return row
+
+    def index_row(self, table, row):
+        for column, index in self.indexes.get(table, {}).items():
+            if row.get(column) is not None:
+                index[row[column]] = row["id"]
+        for column, index in self.multi_indexes.get(table, {}).items():
+            if row.get(column) is not None:
+                index.setdefault(row[column], set()).add(row["id"])
+
+    def unindex_row(self, table, row):
+        for column, index in self.indexes.get(table, {}).items():
+            if index.get(row.get(column)) == row["id"]:
+                del index[row[column]]
+        for column, index in self.multi_indexes.get(table, {}).items():
+            ids = index.get(row.get(column))
+            if ids is not None:
+                ids.discard(row["id"])
+
+    def update_row(self, table, row, fields):
+        """Update a stored row in place, keeping the secondary indexes current."""
+        self.unindex_row(table, row)
+        row.update(fields)
+        self.index_row(table, row)
+
+    # --- supabase-py surface ---
+    def table(self, name):
+        return MemoryQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return MemoryRpc(self, name, params)
+
+    # --- query accounting ---
+    def count_query(self, table, op):
+        self.query_count += 1
+        self.query_breakdown[(table, op)] += 1
+
+    def reset_counts(self):
+        with self.lock:
+            self.query_count = 0
+            self.query_breakdown.clear()
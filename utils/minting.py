@@ -0,0 +1,62 @@
+import time
+
+from utils.card_generator import iter_batch_cards, chunked, skill_prefix
+
+INSERT_CHUNK_SIZE = 1000
+INSERT_RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+
+def next_batch_number(client, skill_name):
+    """
+    Reserve the next batch number for a skill. The counter is kept per serial
+    prefix (SCB-<SKL>-), so skills sharing their first 3 letters share it too.
+    """
+    response = client.rpc("next_card_batch", {"p_prefix": skill_prefix(skill_name)}).execute()
+    value = response.data
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = next(iter(value.values()), None)
+    if value is None:
+        raise RuntimeError(f"Could not reserve a batch number for {skill_name}.")
+    return int(value)
+
+
+def insert_chunk(client, chunk, retries=INSERT_RETRIES, backoff=RETRY_BACKOFF):
+    """
+    Insert one chunk of cards, retrying transient failures with exponential backoff.
+    Rows that already exist are ignored, so re-sending a chunk whose first
+    attempt actually landed is harmless.
+    Returns how many of the chunk's rows are stored: the rows the insert
+    returned, or after a retry the chunk's serials found in the table (the
+    lost attempt may have stored some of them).
+    """
+    for attempt in range(retries + 1):
+        try:
+            response = client.table("cards").upsert(chunk, on_conflict="id", ignore_duplicates=True).execute()
+            if attempt == 0:
+                return len(response.data or [])
+            ids = [card["id"] for card in chunk]
+            return len(client.table("cards").select("id").in_("id", ids).execute().data or [])
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+
+
+def mint_cards(client, skill_name, count, chunk_size=INSERT_CHUNK_SIZE, keep=100):
+    """
+    Mint and persist `count` cards for a skill under a freshly reserved batch.
+    Cards are generated lazily and inserted chunk by chunk.
+    Returns {'batch': n, 'count': rows stored, 'skipped': serials that already
+    existed, 'cards': first `keep` cards}.
+    """
+    batch_num = next_batch_number(client, skill_name)
+    inserted = 0
+    kept = []
+    for chunk in chunked(iter_batch_cards(skill_name, count, batch_num), chunk_size):
+        inserted += insert_chunk(client, chunk)
+        if len(kept) < keep:
+            kept.extend(chunk[:keep - len(kept)])
+    return {"batch": batch_num, "count": inserted, "skipped": count - inserted, "cards": kept}
@@ -0,0 +1,105 @@
+"""
+Rendered-fragment cache for pages whose content is the same for every user
+(skill pages, quizzes).
+
+The template's content block is rendered once per (template, key) and reused
+until the template, its layout or the caller's version changes. Only the thin
+layout (nav with the user's name) is rendered per request, and responses carry
+a strong ETag so repeat views can be answered with 304. The ETag covers the
+fragment and the per-user layout; Last-Modified (template mtimes only) is
+informational and never used to answer 304 on its own.
+"""
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+
+from flask import Response, make_response, render_template, request
+from markupsafe import Markup
+
+# Wraps a cached fragment in the normal layout
+FRAGMENT_PAGE = "fragment_page.html"
+
+
+class Fragment:
+    def __init__(self, html, version, last_modified):
+        self.html = html
+        self.version = version
+        self.last_modified = last_modified
+        self.etag = hashlib.sha256(html.encode("utf-8")).hexdigest()[:32]
+
+    def variant_etag(self, *parts):
+        """ETag for the full page: the fragment plus whatever the layout renders per user."""
+        key = "\0".join([self.etag, *(str(p) for p in parts)])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+class FragmentCache:
+    def __init__(self, app, block="content", layout="base.html"):
+        self.app = app
+        self.block = block
+        self.layout = layout
+        self._lock = threading.Lock()
+        self._fragments = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _template_mtime(self, name):
+        template = self.app.jinja_env.get_template(name)
+        return os.stat(template.filename).st_mtime_ns if template.filename else 0
+
+    def get(self, template_name, key=None, context=None, version=None):
+        """
+        Returns the rendered block of `template_name` for `key`.
+        `context` (a dict or a zero-argument callable) is only used on a miss.
+        """
+        mtime = max(self._template_mtime(template_name), self._template_mtime(self.layout))
+        full_version = (mtime, version)
+        cache_key = (template_name, key)
+        fragment = self._fragments.get(cache_key)
+        if fragment is not None and fragment.version == full_version:
+            self.hits += 1
+            return fragment
+        self.misses += 1
+        values = context() if callable(context) else dict(context or {})
+        template = self.app.jinja_env.get_template(template_name)
+        self.app.update_template_context(values)
+        html = Markup("".join(template.blocks[self.block](template.new_context(values))))
+        last_modified = datetime.fromtimestamp(mtime / 1e9, tz=timezone.utc).replace(microsecond=0)
+        fragment = Fragment(html, full_version, last_modified)
+        with self._lock:
+            self._fragments[cache_key] = fragment
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "fragments": len(self._fragments),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+def fragment_response(fragment, *variant):
+    """
+    Serves a cached fragment inside the layout, or 304 when the client's copy
+    is current. `variant` lists what the layout renders per request (user, role).
+    """
+    etag = fragment.variant_etag(*variant)
+    # Only the ETag validates: If-Modified-Since would miss question-bank and per-user changes
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = make_response(render_template(FRAGMENT_PAGE, fragment=fragment.html))
+    response.set_etag(etag)
+    response.last_modified = fragment.last_modified
+    # Browsers may keep the page but must revalidate, so the per-user access check still runs
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Cookie")
+    return response
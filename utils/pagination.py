@@ -0,0 +1,37 @@
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(key):
+    """Encode a keyset position (a list of column values) as an opaque URL-safe token."""
+    raw = json.dumps(key, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor(); returns None for missing or malformed tokens."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        return None
+    return key if isinstance(key, list) else None
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a ?limit= query value to 1..maximum."""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+
+def quote_filter_value(value):
+    """Quote a value for use inside a PostgREST or=() filter (timestamps contain '.' and ':')."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
@@ -0,0 +1,99 @@
+"""
+Incremental student progress.
+
+Claim, read and quiz events are folded into the progress fields stored on the
+user row (skill_progress, streak, last_activity, badges, badges_earned).
+apply_event() returns only the fields that changed, so each event costs at
+most one write and the dashboard just reads the stored record. For
+skill_progress that is just the flag that turned on, which the database merges
+into the stored map per flag, so concurrent events in other workers are kept.
+"""
+from datetime import datetime, date
+
+BADGE_POINTS = 50  # New badge every 50 points
+
+# Which skill_progress flag each event sets
+EVENT_FLAGS = {
+    "claim": "scanned",
+    "read": "read",
+    "quiz": "quiz_taken",
+}
+
+
+def empty_skill_progress():
+    return {"scanned": False, "read": False, "quiz_taken": False}
+
+
+def _parse_day(value):
+    if isinstance(value, date):
+        return value
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def normalized_skill_progress(record, skill_codes):
+    """skill_progress with every skill and flag present (does not modify the record)."""
+    stored = record.get("skill_progress") or {}
+    progress = {}
+    for code in skill_codes:
+        entry = empty_skill_progress()
+        entry.update(stored.get(code) or {})
+        progress[code] = entry
+    return progress
+
+
+def current_streak(record, today):
+    """Streak as of `today`: a streak whose last activity is older than yesterday has lapsed."""
+    last = _parse_day(record.get("last_activity"))
+    if last is None or (today - last).days > 1:
+        return 0
+    return record.get("streak") or 0
+
+
+def badges_for_points(points):
+    count = (points or 0) // BADGE_POINTS
+    return [f"Badge {i+1}" for i in range(count)]
+
+
+def apply_event(record, event, skill_code, today, skill_codes, points=None):
+    """
+    Fold one event into a user's progress record.
+    `points` is the user's point total after the event, when it changed.
+    Returns a dict of changed fields (empty if nothing changed), with skill_progress
+    as {skill: {flag: True}}; `record` is updated in place with the full progress map.
+    """
+    changes = {}
+
+    # Streak: first activity of a day either extends it (yesterday) or restarts it
+    last = _parse_day(record.get("last_activity"))
+    if last != today:
+        if last is not None and (today - last).days == 1:
+            changes["streak"] = (record.get("streak") or 0) + 1
+        else:
+            changes["streak"] = 1
+        changes["last_activity"] = today.strftime("%Y-%m-%d")
+
+    flag = EVENT_FLAGS.get(event)
+    progress = None
+    if flag and skill_code in skill_codes:
+        progress = normalized_skill_progress(record, skill_codes)
+        if progress[skill_code][flag]:
+            progress = None
+        else:
+            progress[skill_code][flag] = True
+            changes["skill_progress"] = {skill_code: {flag: True}}
+
+    if points is not None:
+        badges = badges_for_points(points)
+        if len(badges) > (record.get("badges_earned") or 0):
+            changes["badges_earned"] = len(badges)
+            changes["badges"] = badges
+
+    record.update(changes)
+    if progress is not None:
+        record["skill_progress"] = progress
+    return changes
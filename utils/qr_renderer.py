@@ -0,0 +1,145 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import qrcode
+import qrcode.image.svg
+from PIL import Image, ImageDraw, ImageFont
+
+QR_FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+# Batches smaller than this render in-process; forking workers costs more than it saves
+PARALLEL_THRESHOLD = 32
+
+# Printable sheet layout: A4 at 150 dpi, 3 x 4 cards per page
+SHEET_DPI = 150
+SHEET_SIZE = (1240, 1754)
+SHEET_COLUMNS = 3
+SHEET_ROWS = 4
+SHEET_MARGIN = 60
+
+_pool = None
+
+
+def render_qr(data, fmt="png"):
+    """Render `data` as a QR code image and return the encoded bytes."""
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=10, border=4)
+    qr.add_data(data)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    if fmt == "svg":
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def cache_path(cache_dir, serial, data, fmt):
+    """Content-addressed cache location: the serial plus a digest of what is encoded."""
+    digest = hashlib.sha256(f"{fmt}\0{data}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{serial}-{digest}.{fmt}")
+
+
+def _render_to_cache(args):
+    """Render one QR into the cache if missing; returns its path. Runs in pool workers."""
+    cache_dir, serial, data, fmt = args
+    path = cache_path(cache_dir, serial, data, fmt)
+    if not os.path.exists(path):
+        content = render_qr(data, fmt)
+        # Write to a temp file first so readers never see a partial image
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+    return path
+
+
+def get_qr(cache_dir, serial, data, fmt="png"):
+    """Return QR image bytes for a card, rendering and caching them on first use."""
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(_render_to_cache((cache_dir, serial, data, fmt)), "rb") as f:
+        return f.read()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        workers = int(os.environ.get("QR_RENDER_WORKERS", 0)) or None
+        # Never fork the (multi-threaded) server process: a child can inherit a lock held by another thread
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+    return _pool
+
+
+def render_many(cache_dir, items, fmt="png"):
+    """
+    Ensure QR images exist for many (serial, data) pairs.
+    Uncached images render in a process pool once the batch is large enough.
+    Returns the cache paths in input order.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    jobs = [(cache_dir, serial, data, fmt) for serial, data in items]
+    missing = [job for job in jobs if not os.path.exists(cache_path(*job))]
+    if len(missing) >= PARALLEL_THRESHOLD:
+        chunksize = max(1, len(missing) // (4 * (os.cpu_count() or 1)))
+        list(_get_pool().map(_render_to_cache, missing, chunksize=chunksize))
+    else:
+        for job in missing:
+            _render_to_cache(job)
+    return [cache_path(*job) for job in jobs]
+
+
+def _sheet_pages(items, paths, title):
+    """Yields one laid-out page at a time, drawn in grayscale and returned as 1-bit."""
+    per_page = SHEET_COLUMNS * SHEET_ROWS
+    cell_w = (SHEET_SIZE[0] - 2 * SHEET_MARGIN) // SHEET_COLUMNS
+    cell_h = (SHEET_SIZE[1] - 2 * SHEET_MARGIN) // SHEET_ROWS
+    qr_size = min(cell_w, cell_h) - 60
+    font = ImageFont.load_default()
+
+    for start in range(0, len(items), per_page):
+        # Grayscale while drawing (a quarter of an RGB page), then 1-bit for the PDF
+        page = Image.new("L", SHEET_SIZE, 255)
+        draw = ImageDraw.Draw(page)
+        if title:
+            draw.text((SHEET_MARGIN, SHEET_MARGIN // 3), title, fill=0, font=font)
+        for offset, ((serial, _), path) in enumerate(zip(items[start:start + per_page], paths[start:start + per_page])):
+            col, row = offset % SHEET_COLUMNS, offset // SHEET_COLUMNS
+            x = SHEET_MARGIN + col * cell_w
+            y = SHEET_MARGIN + row * cell_h
+            with Image.open(path) as qr_image:
+                page.paste(qr_image.convert("L").resize((qr_size, qr_size), Image.NEAREST),
+                           (x + (cell_w - qr_size) // 2, y + 10))
+            draw.text((x + cell_w // 2, y + qr_size + 25), serial, fill=0, font=font, anchor="mt")
+            # Light cut guides around each card (dithered to a dotted line in 1-bit)
+            draw.rectangle([x, y, x + cell_w - 1, y + cell_h - 1], outline=200)
+        yield page.convert("1")
+        page.close()
+
+
+def render_sheet_pdf(cache_dir, items, title=None):
+    """
+    Lay out QR codes for (serial, data) pairs on printable A4 pages and
+    return a multi-page PDF.
+
+    Pages are appended to the PDF one at a time, so memory holds a single
+    page however many cards are printed. They are 1-bit, which Pillow writes
+    with lossless CCITT compression instead of JPEG, keeping the QR modules
+    sharp and the file small.
+    """
+    paths = render_many(cache_dir, items, "png")
+    pages = _sheet_pages(items, paths, title)
+    with tempfile.TemporaryFile() as f:
+        first = next(pages, None) or Image.new("1", SHEET_SIZE, 1)
+        first.save(f, format="PDF", resolution=SHEET_DPI)
+        for page in pages:
+            # Pillow adds each page as an incremental update to the file so far
+            page.save(f, format="PDF", append=True, resolution=SHEET_DPI)
+        f.seek(0)
+        return f.read()
@@ -0,0 +1,104 @@
+"""
+Item analytics over the quiz attempt log.
+
+Attempts are streamed in pages and folded into per-skill count arrays with
+numpy, so memory holds one page at a time however long the log gets. For each
+question this gives the correct rate (difficulty is its complement) and the
+share of attempts picking each option, which for the wrong options is the
+distractor rate.
+
+Answers are stored in question order, so attempts whose length no longer
+matches the current questions.json are counted as stale and skipped.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+UNANSWERED = -1
+
+
+class ItemStats:
+    """Running counts for one skill's quiz."""
+
+    def __init__(self, questions):
+        self.questions = questions
+        self.key = np.array([q["correct"] for q in questions], dtype=np.int16)
+        self.num_questions = len(questions)
+        self.num_options = max(len(q["options"]) for q in questions)
+        self.attempts = 0
+        self.stale = 0
+        self.correct = np.zeros(self.num_questions, dtype=np.int64)
+        self.picks = np.zeros((self.num_questions, self.num_options), dtype=np.int64)
+
+    def add(self, answers):
+        """Fold an (attempts x questions) matrix of chosen options (-1 = skipped) into the counts."""
+        if not len(answers):
+            return
+        self.attempts += answers.shape[0]
+        self.correct += (answers == self.key).sum(axis=0)
+        valid = (answers >= 0) & (answers < self.num_options)
+        # One bincount over (question, option) cells counts every pick in the page
+        cells = np.arange(self.num_questions) * self.num_options + answers
+        self.picks += np.bincount(cells[valid], minlength=self.picks.size).reshape(self.picks.shape)
+
+    def to_dict(self):
+        attempts = max(self.attempts, 1)
+        correct_rate = self.correct / attempts
+        pick_rate = self.picks / attempts
+        items = []
+        for i, question in enumerate(self.questions):
+            options = [
+                {"text": text, "rate": round(float(pick_rate[i, j]), 4), "correct": j == question["correct"]}
+                for j, text in enumerate(question["options"])
+            ]
+            distractors = [o for o in options if not o["correct"]]
+            items.append({
+                "id": question.get("id", i + 1),
+                "question": question["question"],
+                "correct_rate": round(float(correct_rate[i]), 4),
+                "difficulty": round(1 - float(correct_rate[i]), 4),
+                "skip_rate": round(1 - float(pick_rate[i].sum()), 4),
+                "options": options,
+                "top_distractor": max(distractors, key=lambda o: o["rate"])["text"] if distractors else None,
+            })
+        return {"attempts": self.attempts, "stale_attempts": self.stale, "items": items}
+
+
+def answers_matrix(rows, num_questions):
+    """Stack answer lists of the right length into an int16 matrix; returns (matrix, stale_count)."""
+    current = [r for r in rows if len(r) == num_questions]
+    if not current:
+        return np.empty((0, num_questions), dtype=np.int16), len(rows)
+    matrix = np.array(current, dtype=object)
+    matrix[matrix == None] = UNANSWERED # noqa: E711 (elementwise comparison)
+    return matrix.astype(np.int16), len(rows) - len(current)
+
+
+def compute_item_stats(attempts, quizzes, page_size=5000):
+    """
+    Aggregate an iterable of attempt rows ({'skill_name', 'answers'}) against
+    `quizzes` (skill -> list of question dicts from questions.json).
+    Returns skill -> ItemStats.to_dict() for every skill with a quiz.
+    """
+    stats = {skill: ItemStats(questions) for skill, questions in quizzes.items() if questions}
+    pending = defaultdict(list)
+    buffered = 0
+
+    def drain():
+        for skill, rows in pending.items():
+            matrix, stale = answers_matrix(rows, stats[skill].num_questions)
+            stats[skill].add(matrix)
+            stats[skill].stale += stale
+        pending.clear()
+
+    for attempt in attempts:
+        skill = attempt.get("skill_name")
+        if skill not in stats:
+            continue
+        pending[skill].append(attempt.get("answers") or [])
+        buffered += 1
+        if buffered >= page_size:
+            drain()
+            buffered = 0
+    drain()
+    return {skill: s.to_dict() for skill, s in stats.items()}
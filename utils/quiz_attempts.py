@@ -0,0 +1,26 @@
+"""Quiz attempt logging and one-time awards backed by the record_quiz_attempt() database function."""
+
+QUIZ_PASS_POINTS = 20
+
+
+def record_attempt(client, username, skill, answers, score, total, passed, points=QUIZ_PASS_POINTS):
+    """
+    Append an attempt to the log and, on a first pass for this skill, award points.
+    `answers` lists the chosen option per question (None if skipped).
+    Returns a dict with 'attempt_id', 'awarded' and 'points' (the user's total).
+    """
+    response = client.rpc("record_quiz_attempt", {
+        "p_username": username,
+        "p_skill": skill,
+        "p_answers": answers,
+        "p_score": score,
+        "p_total": total,
+        "p_passed": passed,
+        "p_points": points,
+    }).execute()
+    rows = response.data or []
+    if isinstance(rows, dict):
+        rows = [rows]
+    if not rows:
+        return {"attempt_id": None, "awarded": False, "points": None}
+    return rows[0]
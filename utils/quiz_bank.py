@@ -0,0 +1,85 @@
+import json
+import operator
+import os
+import threading
+
+
+class QuizBank:
+    """
+    Process-wide cache of questions.json.
+    The file is parsed once and only re-read when its mtime changes. For each
+    skill the answer key and the template context are precomputed at load time.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._quizzes = {}
+
+    def _load(self):
+        """Parse the question bank and build per-skill answer keys and payloads."""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        quizzes = {}
+        for skill_name, skill_quiz in raw.items():
+            questions = skill_quiz['questions']
+            quizzes[skill_name] = {
+                'answer_key': tuple(q['correct'] for q in questions),
+                'answer_fields': tuple(str(i) for i in range(len(questions))),
+                'option_counts': tuple(len(q['options']) for q in questions),
+                'context': {
+                    'skill_name': skill_name,
+                    'skill_title': skill_quiz['name'],
+                    'description': skill_quiz['description'],
+                    'questions': questions,
+                },
+            }
+        return quizzes
+
+    def _refresh(self):
+        """Reload the file if it changed since the last load (raises FileNotFoundError)."""
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime != self._mtime:
+                self._quizzes = self._load()
+                self._mtime = mtime
+
+    @property
+    def version(self):
+        """mtime of the loaded file; changes whenever the questions are reloaded."""
+        return self._mtime
+
+    def get(self, skill_name):
+        """Return the cached quiz for a skill, or None if there is no quiz for it."""
+        self._refresh()
+        return self._quizzes.get(skill_name)
+
+    def score(self, skill_name, answers):
+        """
+        Score submitted answers ({"0": 1, "1": 2, ...}) against the answer key.
+        Returns (score, total), or None if there is no quiz for the skill.
+        """
+        quiz = self.get(skill_name)
+        if quiz is None:
+            return None
+        given = map(answers.get, quiz['answer_fields'])
+        return sum(map(operator.eq, given, quiz['answer_key'])), len(quiz['answer_key'])
+
+    def responses(self, skill_name, answers):
+        """
+        The chosen option per question, in question order. None where skipped, not
+        an int or not one of the question's options (so the log stays in range).
+        """
+        quiz = self.get(skill_name)
+        if quiz is None:
+            return None
+        return [value if isinstance(value, int) and not isinstance(value, bool) and 0 <= value < options else None
+                for value, options in zip(map(answers.get, quiz['answer_fields']), quiz['option_counts'])]
+
+    def questions(self):
+        """skill -> list of question dicts, as loaded from the file."""
+        self._refresh()
+        return {skill: quiz['context']['questions'] for skill, quiz in self._quizzes.items()}
@@ -0,0 +1,69 @@
+"""
+Fingerprinted static URLs.
+
+static_url('js/app.js') renders as /static/js/app.js?v=<content hash>. A request
+whose fingerprint matches the file on disk is cached for a year (the URL changes
+whenever the file does); anything else is revalidated with the ETag Flask sends.
+"""
+import hashlib
+import os
+import threading
+
+from flask import request, url_for
+
+LONG_MAX_AGE = 365 * 24 * 3600
+
+_lock = threading.Lock()
+_fingerprints = {} # path -> (mtime_ns, size, digest)
+
+
+def fingerprint(path):
+    """Short content hash of a file, recomputed only when its mtime or size changes."""
+    stat = os.stat(path)
+    cached = _fingerprints.get(path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()[:12]
+    with _lock:
+        _fingerprints[path] = (stat.st_mtime_ns, stat.st_size, value)
+    return value
+
+
+def init_static_assets(app):
+    """Registers static_url() for templates and the long-lived caching of fingerprinted files."""
+
+    def static_path(filename):
+        return os.path.join(app.static_folder, filename)
+
+    def static_url(filename):
+        try:
+            version = fingerprint(static_path(filename))
+        except OSError:
+            return url_for("static", filename=filename)
+        return url_for("static", filename=filename, v=version)
+
+    app.jinja_env.globals["static_url"] = static_url
+
+    @app.after_request
+    def _cache_static(response):
+        if request.endpoint != "static" or response.status_code not in (200, 304):
+            return response
+        version = request.args.get("v")
+        filename = (request.view_args or {}).get("filename", "")
+        try:
+            current = fingerprint(static_path(filename)) if version else None
+        except OSError:
+            current = None
+        if version and version == current:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = LONG_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            # Unversioned URLs (e.g. the worker qr-scanner imports itself) revalidate via ETag
+            response.cache_control.no_cache = True
+        return response
@@ -0,0 +1,67 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """
+    Small per-worker cache of user rows keyed by username.
+    Entries expire after `ttl` seconds and the least recently used entry is
+    evicted once `maxsize` is reached. Every write path must call invalidate().
+    """
+
+    def __init__(self, ttl=5.0, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, username):
+        """Return a private copy of the cached row, or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[username]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            row = entry[1]
+        # Callers mutate nested fields (skill_progress), so never hand out the cached dict
+        return copy.deepcopy(row)
+
+    def set(self, username, row):
+        with self._lock:
+            self._entries[username] = (time.monotonic() + self.ttl, copy.deepcopy(row))
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters for this worker."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "ttl": self.ttl,
+                "maxsize": self.maxsize,
+            }
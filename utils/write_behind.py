@@ -0,0 +1,165 @@
+"""
+Write-behind queue for user-row updates that nothing needs to read back from
+the database straight away (streak/activity, progress flags and badges).
+
+Updates are coalesced per user: field sets keep the latest value (nested
+objects such as skill_progress are merged key by key), so a burst of events
+becomes one entry. A background thread flushes everything pending as one batch
+every `interval` seconds and once more at shutdown. Each batch carries an id
+that is reused on every retry, and the apply_user_updates() database function
+records applied ids, so a batch whose response was lost is applied only once.
+
+Until a batch is confirmed, overlay() folds the pending changes into rows read
+from the database, so this worker keeps reading its own writes.
+"""
+import atexit
+import copy
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+def deep_merge(target, fields):
+    """Merges `fields` into `target` in place; nested dicts are merged key by key into copies."""
+    for field, value in fields.items():
+        current = target.get(field)
+        if isinstance(value, dict) and isinstance(current, dict):
+            target[field] = deep_merge(dict(current), value)
+        else:
+            target[field] = copy.deepcopy(value)
+    return target
+
+
+class WriteBehindQueue:
+    def __init__(self, flush, interval=1.0, on_flushed=None, retry_backoff=5.0):
+        """
+        `flush(batch_id, updates)` applies a batch; `updates` is a list of
+        {"username", "set"} dicts. `on_flushed(usernames)` runs
+        after a batch has been applied.
+        """
+        self._flush = flush
+        self.interval = interval
+        self.retry_backoff = retry_backoff
+        self._on_flushed = on_flushed
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._pending = {}
+        self._inflight = None # (batch_id, entries) until the database confirms it
+        self.batches = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    # --- enqueueing ---
+    def _entry(self, key):
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = self._pending[key] = {"set": {}}
+        else:
+            self.coalesced += 1
+        return entry
+
+    def set(self, key, fields):
+        if not fields:
+            return
+        with self._lock:
+            deep_merge(self._entry(key)["set"], fields)
+        self._ensure_started()
+
+    # --- read-your-writes ---
+    def _entries_for(self, key):
+        entries = []
+        if self._inflight is not None and key in self._inflight[1]:
+            entries.append(self._inflight[1][key])
+        if key in self._pending:
+            entries.append(self._pending[key])
+        return entries
+
+    def overlay(self, key, row):
+        """Applies this worker's unflushed changes for `key` to `row` in place and returns it."""
+        if row is None:
+            return row
+        with self._lock:
+            for entry in self._entries_for(key):
+                deep_merge(row, entry["set"])
+        return row
+
+    # --- flushing ---
+    def flush(self):
+        """Sends the in-flight batch (a failed earlier one) or else everything pending. Returns True on success."""
+        with self._flush_lock:
+            with self._lock:
+                if self._inflight is None:
+                    if not self._pending:
+                        return True
+                    self._inflight = (str(uuid.uuid4()), self._pending)
+                    self._pending = {}
+                batch_id, entries = self._inflight
+            updates = [{"username": key, **entry} for key, entry in entries.items()]
+            try:
+                self._flush(batch_id, updates)
+            except Exception:
+                # Keep the batch and its id; the retry is a no-op if this attempt actually landed
+                self.failures += 1
+                logger.exception("write-behind flush of %d users failed; will retry", len(updates))
+                return False
+            with self._lock:
+                self._inflight = None
+                self.batches += 1
+            if self._on_flushed is not None:
+                self._on_flushed(list(entries))
+            return True
+
+    def drain(self, attempts=3):
+        """Flushes until nothing is pending (used at shutdown)."""
+        for _ in range(attempts):
+            if not self.flush():
+                continue
+            with self._lock:
+                if not self._pending and self._inflight is None:
+                    return True
+        return False
+
+    def _run(self):
+        delay = self.interval
+        while not self._stopping:
+            self._wake.wait(delay)
+            self._wake.clear()
+            delay = self.interval if self.flush() else self.retry_backoff
+
+    def _ensure_started(self):
+        if self.interval <= 0:
+            self.flush() # interval 0 means write-through
+            return
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            # Started lazily so each (forked) gunicorn worker gets its own thread
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        self.drain()
+
+    def stats(self):
+        with self._lock:
+            inflight = len(self._inflight[1]) if self._inflight else 0
+            return {
+                "pending_users": len(self._pending),
+                "inflight_users": inflight,
+                "batches": self.batches,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "interval": self.interval,
+            }